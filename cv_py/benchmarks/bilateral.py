@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+import argparse
+import time
+import cv2 as cv
+import cv_py
+from cv_py import BILATERAL
+from synthetic import RESOLUTION, blob_frame
+
+"""
+    功能:
+    比較cv_py.bilateral各模式與cv.bilateralFilter的執行時間與PSNR.
+
+    使用方式:
+    python3 bilateral.py\n
+    python3 bilateral.py -r VGA 720p -q 0.5 0.25
+"""
+
+# (distance, sigma_color, sigma_space)
+PARAM = (9, 75, 75), (-1, 30, 5), (-1, 50, 12)
+
+def timed(fn_, number_: int) -> 'tuple[float, object]':
+    result = fn_()
+    start = time.perf_counter()
+    for _ in range(number_):
+        fn_()
+    return (time.perf_counter() - start) / number_ * 1e3, result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="cv_py.bilateral speed and PSNR")
+    parser.add_argument("-r", "--resolution", nargs="+", choices=tuple(RESOLUTION),
+                        default=("VGA", "720p"))
+    parser.add_argument("-q", "--quality", nargs="+", type=float, default=(0.5, 0.25))
+    parser.add_argument("-n", "--number", type=int, default=3)
+    args = parser.parse_args()
+
+    for label in args.resolution:
+        frame = cv.GaussianBlur(blob_frame(RESOLUTION[label], 40, 0.01), (3, 3), 0)
+        for distance, sigma_color, sigma_space in PARAM:
+            exact_ms, exact = timed(lambda: cv.bilateralFilter(frame, distance, sigma_color,
+                                                               sigma_space), args.number)
+            print(f"{label} d={distance} sc={sigma_color} ss={sigma_space}  "
+                  f"cv.bilateralFilter {exact_ms:9.1f} ms")
+
+            case = [("TILED", BILATERAL.BILATERAL_TILED, 1)]
+            case += [(f"DOWNSAMPLE q={q}", BILATERAL.BILATERAL_DOWNSAMPLE, q) for q in args.quality]
+            case += [("GRID", BILATERAL.BILATERAL_GRID, 1)]
+            for name, mode, quality in case:
+                cost, result = timed(lambda: cv_py.bilateral(frame, distance, sigma_color,
+                                                             sigma_space, mode, quality),
+                                     args.number)
+                print(f"    {name:<18} {cost:9.1f} ms  x{exact_ms / cost:6.1f}  "
+                      f"PSNR {cv.PSNR(exact, result):6.2f} dB")
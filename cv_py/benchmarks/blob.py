@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+import timeit
+import cv2 as cv
+import numpy as np
+import cv_py
+from synthetic import RESOLUTION, blob_mask
+
+"""
+    功能:
+    比較在有大量雜點的二值影像上, 以findContours加largest_contour與以
+    BlobTable找出最大色塊(含輪廓)的執行時間.
+
+    使用方式:
+    python3 blob.py
+"""
+
+def by_contour(mask_: np.ndarray) -> np.ndarray:
+    contours, _ = cv.findContours(mask_, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
+    index = cv_py.largest_contour(contours, 100, 2)
+    return [contours[i] for i in index or ()]
+
+def by_blob(mask_: np.ndarray) -> np.ndarray:
+    blobs = cv_py.BlobTable(mask_)
+    index = cv_py.largest_contour(blobs, 100, 2)
+    return [blobs[i] for i in index or ()]
+
+if __name__ == "__main__":
+    for label in ("VGA", "720p", "1080p"):
+        for noise in (0.001, 0.01, 0.05):
+            mask = blob_mask(RESOLUTION[label], 10, noise)
+            speck = cv.connectedComponents(mask)[0] - 1
+            contour, blob = by_contour(mask), by_blob(mask)
+            same = len(contour) == len(blob) and all(cv.boundingRect(a) == cv.boundingRect(b)
+                                                     for a, b in zip(contour, blob))
+            loop = 5
+            cost_contour = timeit.timeit(lambda: by_contour(mask), number=loop) / loop
+            cost_blob = timeit.timeit(lambda: by_blob(mask), number=loop) / loop
+            print(f"{label:>5}  noise={noise:<5}  blobs={speck:>6}  "
+                  f"findContours {cost_contour * 1e3:8.2f} ms  "
+                  f"BlobTable {cost_blob * 1e3:8.2f} ms  x{cost_contour / cost_blob:5.1f}  "
+                  f"same={same}")
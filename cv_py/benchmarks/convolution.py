@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+import timeit
+import cv2 as cv
+import numpy as np
+import cv_py
+
+"""
+    功能:
+    比較cv_py.convolution與原本以cv.filter2D搭配二維平均內核的執行時間.
+
+    使用方式:
+    python3 convolution.py
+"""
+
+RESOLUTION = {"720p": (720, 1280), "1080p": (1080, 1920)}
+
+def filter2d_box(src_: np.ndarray, k_size_: int) -> np.ndarray:
+    '''
+        用途:
+        原本的實作方式, 每次建立二維平均內核並呼叫cv.filter2D.
+    '''
+    kernel_conv = np.ones((k_size_, k_size_)) / k_size_ ** 2
+    return cv.filter2D(src_, -1, kernel_conv)
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    for label, shape in RESOLUTION.items():
+        frame = rng.integers(0, 256, shape + (3,), np.uint8)
+        for k_size in range(3, 52, 6):
+            loop = 10
+            cost_2d = timeit.timeit(lambda: filter2d_box(frame, k_size), number=loop) / loop
+            cost_sep = timeit.timeit(lambda: cv_py.convolution(frame, k_size), number=loop) / loop
+            print(f"{label:>5}  k={k_size:>2}  filter2D {cost_2d * 1e3:8.3f} ms  "
+                  f"convolution {cost_sep * 1e3:8.3f} ms")
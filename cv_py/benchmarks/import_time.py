@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+"""
+    功能:
+    量測在新的直譯器中import cv_py並取用指定名稱所需的時間, 並檢查
+    延遲載入沒有失效: 只用largest_contour時不應載入trackbar等模組.
+
+    使用方式:
+    python3 import_time.py\n
+    python3 import_time.py --max-ms 400 -n 20
+
+    注意事項:
+    檢查失敗或超過--max-ms時程式結束碼為1, 可放在CI中防止退步.
+"""
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+
+# 取用的名稱 -> 不應被載入的子模組
+GUARD = {"largest_contour": ("cv_py.trackbar", "cv_py.stream", "cv_py.parallel",
+                             "cv_py.pipeline", "cv_py.color", "cv_py.recognize"),
+         "morph": ("cv_py.trackbar", "cv_py.stream", "cv_py.parallel", "cv_py.image"),
+         "Trackbar": ("cv_py.stream", "cv_py.parallel", "cv_py.pipeline", "cv_py.image")}
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import cv_py
+cv_py.{name}
+cost = time.perf_counter() - start
+print(cost * 1e3)
+print(" ".join(name for name in sys.modules if name.startswith("cv_py")))
+"""
+
+BASELINE = """
+import time
+start = time.perf_counter()
+import cv2, numpy
+print((time.perf_counter() - start) * 1e3)
+"""
+
+def run(code_: 'str') -> 'list[str]':
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (SRC, os.environ.get("PYTHONPATH")))))
+    output = subprocess.run([sys.executable, "-c", code_], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return output.splitlines()
+
+def measure(name_: 'str', number_: int) -> 'tuple[float, set[str]]':
+    '''
+        用途:
+        返回取用name_所需時間的中位數(ms)與載入的cv_py子模組.
+    '''
+    cost = []
+    loaded = set()
+    for _ in range(number_):
+        line = run(PROBE.format(name=name_))
+        cost.append(float(line[0]))
+        loaded = set(line[1].split()) if len(line) > 1 else set()
+    return statistics.median(cost), loaded
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="cv_py import time and lazy loading guard")
+    parser.add_argument("-n", "--number", type=int, default=10, help="interpreters per name")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="fail when cv_py adds more than this over importing cv2 and numpy")
+    parser.add_argument("-o", "--output", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    base = statistics.median(float(run(BASELINE)[0]) for _ in range(args.number))
+    print(f"{'cv2 + numpy':<20} {base:8.1f} ms")
+
+    failed = False
+    result = {"cv2 + numpy": base}
+    for name, forbidden in GUARD.items():
+        cost, loaded = measure(name, args.number)
+        result[name] = cost
+        extra = sorted(loaded.intersection(forbidden))
+        print(f"{name:<20} {cost:8.1f} ms  (+{cost - base:.1f})  {' '.join(sorted(loaded))}")
+        if extra:
+            failed = True
+            print(f"[guard] cv_py.{name} loaded {', '.join(extra)}", file=sys.stderr)
+        if args.max_ms is not None and cost - base > args.max_ms:
+            failed = True
+            print(f"[guard] cv_py.{name} import is {cost - base:.1f} ms over cv2 + numpy",
+                  file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(result, file, indent=4)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+import timeit
+import cv_py
+from synthetic import speck_contours
+
+"""
+    功能:
+    量測cv_py.largest_contour在不同輪廓數量下的執行時間.
+
+    使用方式:
+    python3 largest_contour.py
+"""
+
+if __name__ == "__main__":
+    for number in (10, 1000, 50000):
+        contours = speck_contours(number)
+        for number_found in (1, 10, 0):
+            loop = max(1, int(2e5 / number))
+            cost = timeit.timeit(lambda: cv_py.largest_contour(contours, 4, number_found),
+                                 number=loop) / loop
+            print(f"contours={len(contours):>6}  number_found={number_found:>2}  "
+                  f"{cost * 1e3:9.3f} ms")
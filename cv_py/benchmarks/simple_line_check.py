@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+import timeit
+import numpy as np
+import cv_py
+from synthetic import line_contours
+
+"""
+    功能:
+    以合成的線段與折線輪廓比對simple_line_check_batch和逐一呼叫
+    simple_line_check的結果, 並量測兩者的執行時間.
+
+    使用方式:
+    python3 simple_line_check.py
+"""
+
+if __name__ == "__main__":
+    for number in (10, 100, 1000):
+        contours = line_contours(number)
+        table = cv_py.ContourTable(contours)
+        single = np.array([cv_py.simple_line_check(contour, 20) for contour in contours])
+        batch = cv_py.simple_line_check_batch(table, 20)
+        if not np.array_equal(single, batch):
+            raise SystemExit(f"Mismatch at {np.flatnonzero(single != batch)}")
+
+        loop = max(1, int(2000 / number))
+        cost_single = timeit.timeit(lambda: [cv_py.simple_line_check(contour, 20)
+                                             for contour in contours], number=loop) / loop
+        cost_batch = timeit.timeit(lambda: cv_py.simple_line_check_batch(table, 20),
+                                   number=loop) / loop
+        print(f"contours={len(contours):>5}  lines={int(batch.sum()):>4}  "
+              f"single {cost_single * 1e3:8.3f} ms  batch {cost_batch * 1e3:8.3f} ms")
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+import cv2 as cv
+import numpy as np
+import cv_py
+from typing import Callable, Iterator
+from synthetic import (BLOB_HSV_MAX, BLOB_HSV_MIN, RESOLUTION, blob_frame, blob_mask,
+                       line_contours, speck_contours)
+
+"""
+    功能:
+    以合成影像量測cv_py/__init__.py中所有公開函式的執行時間, 結果寫成
+    JSON, 並可與先前儲存的基準比較, 找出效能退步的項目.
+
+    使用方式:
+    python3 suite.py -o result.json\n
+    python3 suite.py -o new.json -b result.json -t 0.2\n
+    python3 suite.py --quick -k morph
+
+    注意事項:
+    1. 比較基準時以每次呼叫的中位數為準, 超過基準(1 + 容許比例)
+       視為退步, 程式結束碼為1.
+    2. 新增公開名稱時請在CASE加入對應項目, 或在SKIP註明原因,
+       否則執行時會列出未涵蓋的名稱.
+"""
+
+# 名稱 -> 產生(標籤, 待測函式)的函式
+CASE: 'dict[str, Callable[[argparse.Namespace], Iterator]]' = {}
+
+# 不量測的公開名稱與原因
+SKIP = {"SLICE": "enum",
+        "BILATERAL": "enum",
+        "autotune_cache": "accessor, covered by autotune",
+        "PipelineResult": "result type",
+        "PyramidResult": "result type",
+        "HighGUIBackend": "needs a display, covered by MemoryBackend through Trackbar",
+        "Mouse": "listed in __all__ but not defined"}
+
+CONTOUR_COUNT = 10, 1000, 50000
+QUICK_CONTOUR_COUNT = 10, 1000
+
+def case(*name_: str):
+    '''
+        用途:
+        將產生量測項目的函式註冊到CASE.
+
+        參數 name_: 涵蓋的公開名稱, 可為多個.
+    '''
+    def register(fn_):
+        for name in name_:
+            CASE[name] = fn_
+        return fn_
+    return register
+
+def resolutions(args_: argparse.Namespace) -> 'Iterator[tuple[str, tuple[int, int]]]':
+    for label in args_.resolution:
+        yield label, RESOLUTION[label]
+
+def contour_counts(args_: argparse.Namespace) -> 'tuple[int]':
+    return QUICK_CONTOUR_COUNT if args_.quick else CONTOUR_COUNT
+
+@case("bilateral")
+def case_bilateral(args_):
+    for label, shape in resolutions(args_):
+        frame = blob_frame(shape, 20, 0.01)
+        yield label, lambda: cv_py.bilateral(frame, 9, 75, 75)
+        yield f"{label},downsample", lambda: cv_py.bilateral(frame, 9, 75, 75,
+                                                             cv_py.BILATERAL.BILATERAL_DOWNSAMPLE)
+        yield f"{label},grid", lambda: cv_py.bilateral(frame, -1, 50, 12,
+                                                       cv_py.BILATERAL.BILATERAL_GRID)
+
+@case("blur", "convolution", "gaussian", "median")
+def case_filter(args_):
+    for label, shape in resolutions(args_):
+        frame = blob_frame(shape, 20, 0.01)
+        yield f"blur[{label},k=5]", lambda: cv_py.blur(frame, 5)
+        yield f"convolution[{label},k=5]", lambda: cv_py.convolution(frame, 5)
+        yield f"gaussian[{label},k=5]", lambda: cv_py.gaussian(frame, 5)
+        yield f"median[{label},k=5]", lambda: cv_py.median(frame, 5)
+
+@case("autotune")
+def case_autotune(args_):
+    for label, shape in resolutions(args_):
+        frame = blob_frame(shape, 20, 0.01)
+        cv_py.autotune(True)
+        for name in ("blur", "gaussian", "median"):
+            fn = getattr(cv_py, name)
+            fn(frame, 9)
+            yield f"autotune[{label},{name},k=9]", lambda: fn(frame, 9)
+        cv_py.autotune(False)
+
+@case("morph")
+def case_morph(args_):
+    for label, shape in resolutions(args_):
+        mask = blob_mask(shape, 50, 0.01)
+        yield f"{label},open", lambda: cv_py.morph(mask, cv.MORPH_OPEN, 5)
+        yield f"{label},chain", lambda: cv_py.morph(mask, (cv.MORPH_OPEN, cv.MORPH_CLOSE, cv.MORPH_DILATE),
+                                                    (5, 5, 3), (cv.MORPH_RECT,) * 3)
+
+@case("slice", "slice_half")
+def case_slice(args_):
+    for label, shape in resolutions(args_):
+        frame = blob_frame(shape, 1)
+        yield f"slice[{label}]", lambda: cv_py.slice(frame, shape[0] // 3, cv_py.SLICE.SLICE_HORIZONTAL)
+        yield f"slice_half[{label}]", lambda: cv_py.slice_half(frame, cv_py.SLICE.SLICE_LONGEST)
+
+@case("tile", "Tile", "process_tiles")
+def case_tile(args_):
+    for label, shape in resolutions(args_):
+        frame = blob_frame(shape, 20, 0.01)
+        yield f"tile[{label},4x4]", lambda: cv_py.tile(frame, 4, 4, 8)
+        yield f"process_tiles[{label},median,2x2]", lambda: cv_py.process_tiles(
+            frame, lambda view: cv.medianBlur(view, 5), 2, 2, 2)
+
+@case("largest_contour", "ContourTable", "ContourSet")
+def case_contour(args_):
+    for number in contour_counts(args_):
+        contours = speck_contours(number)
+        table = cv_py.ContourTable(contours)
+        yield f"largest_contour[n={number}]", lambda: cv_py.largest_contour(contours, 4, 1)
+        yield f"largest_contour[n={number},table]", lambda: cv_py.largest_contour(table, 4, 1)
+        yield f"ContourTable[n={number}]", lambda: cv_py.ContourTable(contours)
+        contour_set = cv_py.ContourSet.from_contours(contours)
+        yield f"ContourSet[n={number}]", lambda: cv_py.ContourSet.from_contours(contours)
+        yield f"largest_contour[n={number},set]", lambda: cv_py.largest_contour(
+            cv_py.ContourSet(contour_set.points, contour_set.offsets), 4, 1)
+
+@case("BlobTable")
+def case_blob(args_):
+    for label, shape in resolutions(args_):
+        mask = blob_mask(shape, 10, 0.01)
+
+        def largest():
+            blobs = cv_py.BlobTable(mask)
+            return [blobs[i] for i in cv_py.largest_contour(blobs, 100, 2) or ()]
+        yield f"BlobTable[{label},noise=0.01]", largest
+
+@case("simple_line_check", "simple_line_check_batch")
+def case_line(args_):
+    for number in (10, 100) if args_.quick else (10, 100, 1000):
+        contours = line_contours(number)
+        yield f"simple_line_check[n={number}]", lambda: [cv_py.simple_line_check(contour, 20)
+                                                         for contour in contours]
+        yield f"simple_line_check_batch[n={number}]", lambda: cv_py.simple_line_check_batch(contours, 20)
+
+@case("average_point")
+def case_average_point(args_):
+    points = [(i, i * 2) for i in range(100)]
+    yield "n=100", lambda: cv_py.average_point(*points)
+
+@case("ContourTracker")
+def case_contour_tracker(args_):
+    for number in (10, 100) if args_.quick else (10, 100, 1000):
+        table = cv_py.ContourTable(speck_contours(number))
+        tracker = cv_py.ContourTracker()
+        tracker.update(table)
+        yield f"n={number}", lambda: tracker.update(table)
+
+@case("ROITracker")
+def case_roi_tracker(args_):
+    for label, shape in resolutions(args_):
+        mask = blob_mask(shape, 1, seed_=3)
+        tracker = cv_py.ROITracker(refresh_=0)
+
+        def track():
+            contours = tracker.find_contours(tracker.crop(mask))
+            index = cv_py.largest_contour(contours, 0, 1)
+            tracker.update(cv.boundingRect(contours[index[0]]) if index else None)
+        track()
+        yield label, track
+
+@case("HSVLookup")
+def case_hsv_lookup(args_):
+    lookup = cv_py.HSVLookup(((BLOB_HSV_MIN, BLOB_HSV_MAX),))
+    for label, shape in resolutions(args_):
+        frame = blob_frame(shape, 20, 0.01)
+        yield label, lambda: lookup.apply(frame)
+
+@case("HSVCalibrator")
+def case_hsv_calibrator(args_):
+    calibrator = cv_py.HSVCalibrator()
+    for label, shape in resolutions(args_):
+        hsv = cv.cvtColor(blob_frame(shape, 20, 0.01), cv.COLOR_BGR2HSV)
+        yield label, lambda: calibrator.update(hsv)
+    yield "HSVCalibrator[bounds]", calibrator.bounds
+
+@case("Pipeline")
+def case_pipeline(args_):
+    for label, shape in resolutions(args_):
+        frame = blob_frame(shape, 20, 0.01)
+        pipeline = cv_py.Pipeline().hsv_threshold(BLOB_HSV_MIN, BLOB_HSV_MAX) \
+                                   .morph(cv.MORPH_OPEN, 5).contours().largest(1000, 2)
+        yield label, lambda: pipeline.run(frame)
+
+@case("FrameGate")
+def case_frame_gate(args_):
+    for label, shape in resolutions(args_):
+        frame = blob_frame(shape, 20, 0.01)
+        gate = cv_py.FrameGate()
+        gate.check(frame)
+        yield label, lambda: gate.check(frame)
+        pipeline = cv_py.Pipeline().gate().hsv_threshold(BLOB_HSV_MIN, BLOB_HSV_MAX) \
+                                   .morph(cv.MORPH_OPEN, 5).contours().largest(1000, 2)
+        yield f"Pipeline[gate,{label}]", lambda: pipeline.run(frame)
+
+@case("pyramid_detect", "scale_kernel")
+def case_pyramid(args_):
+    def threshold(img):
+        return cv.inRange(cv.cvtColor(img, cv.COLOR_BGR2HSV), BLOB_HSV_MIN, BLOB_HSV_MAX)
+    for label, shape in resolutions(args_):
+        frame = blob_frame(shape, 20, 0.01)
+        yield f"pyramid_detect[{label}]", lambda: cv_py.pyramid_detect(frame, threshold, 1, 1000, 2,
+                                                                       (cv.MORPH_OPEN, 5))
+    yield "scale_kernel[level=2]", lambda: cv_py.scale_kernel((3, 5, 7), 2)
+
+@case("Trackbar", "MemoryBackend")
+def case_trackbar(args_):
+    name = "Hmin", "Smin", "Vmin", "Hmax", "Smax", "Vmax"
+    trackbar = cv_py.Trackbar("BENCH", name, (0, 0, 0, 180, 255, 255),
+                              (180, 255, 255, 180, 255, 255), cv_py.MemoryBackend())
+    trackbar.set_group("min", name[:3])
+    trackbar.set_group("max", name[3:])
+    yield "Trackbar.values", lambda: trackbar.values("min")
+    yield "Trackbar.snapshot", trackbar.snapshot
+    yield "Trackbar.change_value", lambda: trackbar.change_value("Hmin", 10)
+    yield "Trackbar.version", lambda: trackbar.version("min")
+
+@case("StageGraph")
+def case_stage_graph(args_):
+    trackbar = cv_py.Trackbar("BENCH_GRAPH", ("Hmin", "Smin", "Vmin", "Hmax", "Smax", "Vmax",
+                                              "k_size"),
+                              BLOB_HSV_MIN + BLOB_HSV_MAX + (5,),
+                              (180, 255, 255, 180, 255, 255, 20), cv_py.MemoryBackend())
+    trackbar.set_group("min", ("Hmin", "Smin", "Vmin"))
+    trackbar.set_group("max", ("Hmax", "Smax", "Vmax"))
+    for label, shape in resolutions(args_):
+        frame = blob_frame(shape, 20, 0.01)
+        graph = cv_py.StageGraph()
+        graph.add("median", lambda image: cv_py.median(image, 5), "frame")
+        graph.add("hsv", lambda image: cv.cvtColor(image, cv.COLOR_BGR2HSV), "median")
+        graph.add("binary", cv.inRange, "hsv", param_=((trackbar, "min"), (trackbar, "max")))
+        graph.add("morph", lambda binary, k_size: cv_py.morph(binary, cv.MORPH_OPEN, k_size),
+                  "binary", param_=((trackbar, "k_size"),))
+        graph.run(frame)
+        yield f"StageGraph[hit,{label}]", lambda: graph.run(frame)
+
+        def retune(size=[5]):
+            size[0] = 12 - size[0]
+            trackbar.change_value("k_size", size[0])
+            return graph.run(frame)
+        yield f"StageGraph[k_size,{label}]", retune
+        yield f"StageGraph[new frame,{label}]", lambda: graph.run(frame.copy())
+
+@case("FrameQueue", "Stream")
+def case_stream(args_):
+    queue = cv_py.FrameQueue(2)
+    frame = blob_frame(RESOLUTION["VGA"], 1)
+    yield "FrameQueue.put+get", lambda: (queue.put(frame), queue.get())
+
+    def stream():
+        with cv_py.Stream((frame for _ in range(30)), lambda image: image.shape, 32) as running:
+            for _ in running.results(5):
+                pass
+    yield "Stream[VGA,30 frames]", stream
+
+def video_task(frame_: np.ndarray):
+    return cv_py.largest_contour(cv.findContours(
+        cv.inRange(frame_, BLOB_COLOR_MIN, BLOB_COLOR_MAX),
+        cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)[0], 0, 1)
+
+BLOB_COLOR_MIN = 0, 0, 200
+BLOB_COLOR_MAX = 60, 60, 255
+
+@case("process_video", "imap_video")
+def case_video(args_):
+    path = os.path.join(tempfile.mkdtemp(), "bench.avi")
+    shape = RESOLUTION["VGA"]
+    writer = cv.VideoWriter(path, cv.VideoWriter_fourcc(*"MJPG"), 30, shape[::-1])
+    for seed in range(30):
+        writer.write(blob_frame(shape, 10, seed_=seed))
+    writer.release()
+    yield "process_video[VGA,30 frames,2 workers]", lambda: cv_py.process_video(path, video_task, 2)
+    yield "imap_video[VGA,30 frames,2 workers]", lambda: sum(1 for _ in cv_py.imap_video(path, video_task, 2))
+
+@case("profiling")
+def case_profiling(args_):
+    contours = speck_contours(10)
+    raw = cv_py.largest_contour.__wrapped__
+    yield "profiling[unwrapped]", lambda: raw(contours, 0, 1)
+    cv_py.profiling.disable()
+    yield "profiling[disabled]", lambda: cv_py.largest_contour(contours, 0, 1)
+    cv_py.profiling.enable(window_=64)
+    yield "profiling[enabled]", lambda: cv_py.largest_contour(contours, 0, 1)
+    cv_py.profiling.disable()
+    cv_py.profiling.reset()
+
+def measure(fn_: Callable, repeat_: int, min_time_: float) -> 'dict[str, float]':
+    '''
+        用途:
+        量測單次呼叫的時間, 自動決定每輪呼叫次數使每輪至少min_time_秒.
+
+        參數 fn_: 待測函式.
+        參數 repeat_: 量測輪數.
+        參數 min_time_: 每輪最少秒數.
+    '''
+    fn_()
+    timer = timeit.Timer(fn_)
+    loop = 1
+    while True:
+        cost = timer.timeit(loop)
+        if cost >= min_time_ or loop >= 1 << 20:
+            break
+        loop *= max(2, min(10, int(min_time_ / max(cost, 1e-9))))
+
+    cost = [timer.timeit(loop) / loop * 1e3 for _ in range(repeat_)]
+    return {"median_ms": statistics.median(cost), "min_ms": min(cost), "loops": loop}
+
+def collect(args_: argparse.Namespace) -> 'dict[str, dict]':
+    '''
+        用途:
+        執行所有(或符合篩選條件的)量測項目.
+    '''
+    result = {}
+    done = set()
+    for name in cv_py.__all__:
+        if name in SKIP:
+            continue
+        fn = CASE.get(name)
+        if fn is None:
+            print(f"[uncovered] {name}", file=sys.stderr)
+            continue
+        if fn in done:
+            continue
+        done.add(fn)
+
+        for label, bench in fn(args_):
+            key = label if "[" in label or "." in label else f"{name}[{label}]"
+            if args_.keyword and args_.keyword not in key:
+                continue
+            result[key] = measure(bench, args_.repeat, args_.min_time)
+            print(f"{key:<50} {result[key]['median_ms']:10.4f} ms", flush=True)
+    return result
+
+def compare(result_: 'dict[str, dict]', baseline_: 'dict[str, dict]',
+            tolerance_: float) -> 'list[str]':
+    '''
+        用途:
+        與基準比較, 印出比例並返回退步的項目名稱.
+
+        參數 result_: 本次結果.
+        參數 baseline_: 基準結果.
+        參數 tolerance_: 容許比例, 例如0.2表示慢20%以內不算退步.
+    '''
+    regression = []
+    for key, value in result_.items():
+        if key not in baseline_:
+            continue
+        ratio = value["median_ms"] / max(baseline_[key]["median_ms"], 1e-9)
+        mark = ""
+        if ratio > 1 + tolerance_:
+            regression.append(key)
+            mark = "  REGRESSION"
+        elif ratio < 1 - tolerance_:
+            mark = "  faster"
+        print(f"{key:<50} x{ratio:6.2f}{mark}")
+    return regression
+
+def parse_args(argv_: 'list[str]' = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="cv_py benchmark suite")
+    parser.add_argument("-o", "--output", help="write results to this JSON file")
+    parser.add_argument("-b", "--baseline", help="compare against this JSON file")
+    parser.add_argument("-t", "--tolerance", type=float, default=0.2,
+                        help="allowed slowdown ratio before a case is a regression")
+    parser.add_argument("-r", "--resolution", nargs="+", choices=tuple(RESOLUTION),
+                        default=None, help="resolutions to run, default all")
+    parser.add_argument("-k", "--keyword", help="only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05,
+                        help="minimum seconds per timing round")
+    parser.add_argument("--quick", action="store_true",
+                        help="VGA and 720p only, fewer contours")
+    args = parser.parse_args(argv_)
+    if args.resolution is None:
+        args.resolution = ("VGA", "720p") if args.quick else tuple(RESOLUTION)
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    result = collect(args)
+    report = {"meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "python": platform.python_version(),
+                       "numpy": np.__version__,
+                       "opencv": cv.__version__,
+                       "machine": platform.machine(),
+                       "processor": platform.processor(),
+                       "cpu_count": os.cpu_count()},
+              "results": result}
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=4)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        if compare(result, baseline, args.tolerance):
+            sys.exit(1)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+import cv2 as cv
+import numpy as np
+
+"""
+    功能:
+    產生可重現的合成影像與輪廓, 供benchmarks使用, 不需要攝影機.
+    相同參數與亂數種子一定產生相同的結果.
+"""
+
+RESOLUTION = {"VGA": (480, 640), "720p": (720, 1280),
+              "1080p": (1080, 1920), "4K": (2160, 3840)}
+
+BLOB_COLOR = 0, 0, 255
+BLOB_HSV_MIN = 0, 150, 100
+BLOB_HSV_MAX = 10, 255, 255
+
+def blob_mask(shape_: 'tuple[int, int]', blobs_: int, noise_: float=0.0,
+              seed_: int=0) -> np.ndarray:
+    '''
+        用途:
+        產生含有指定數量實心圓與矩形的二值影像.
+
+        參數 shape_: 影像大小(高, 寬).
+        參數 blobs_: 色塊數量.
+        參數 noise_: 椒鹽雜訊比例, 0~1.
+        參數 seed_: 亂數種子.
+    '''
+    rng = np.random.default_rng(seed_)
+    height, width = shape_
+    mask = np.zeros(shape_, np.uint8)
+    radius_max = max(4, int(min(shape_) / (2 * np.sqrt(max(blobs_, 1)))))
+    for i in range(blobs_):
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        r = int(rng.integers(2, radius_max + 1))
+        if i % 2:
+            cv.circle(mask, (x, y), r, 255, -1)
+        else:
+            cv.rectangle(mask, (x - r, y - r // 2), (x + r, y + r // 2), 255, -1)
+
+    if noise_ > 0:
+        mask[rng.random(shape_) < noise_] = 255
+    return mask
+
+def blob_frame(shape_: 'tuple[int, int]', blobs_: int, noise_: float=0.0,
+               seed_: int=0) -> np.ndarray:
+    '''
+        用途:
+        產生灰色背景加上紅色色塊的BGR影像, 可用BLOB_HSV_MIN/MAX二值化.
+
+        參數 shape_: 影像大小(高, 寬).
+        參數 blobs_: 色塊數量.
+        參數 noise_: 紅色雜點比例, 0~1.
+        參數 seed_: 亂數種子.
+    '''
+    rng = np.random.default_rng(seed_ + 1)
+    frame = rng.integers(90, 110, shape_ + (3,), dtype=np.uint8)
+    frame[blob_mask(shape_, blobs_, noise_, seed_) > 0] = BLOB_COLOR
+    return frame
+
+def speck_contours(number_: int, seed_: int=0) -> 'tuple[np.ndarray]':
+    '''
+        用途:
+        產生含有指定數量互不相連斑點的二值影像, 並返回其輪廓.
+
+        參數 number_: 斑點數量.
+        參數 seed_: 亂數種子.
+    '''
+    rng = np.random.default_rng(seed_)
+    side = int(np.ceil(np.sqrt(number_)))
+    mask = np.zeros((side * 8, side * 8), np.uint8)
+    for i in range(number_):
+        y, x = divmod(i, side)
+        w, h = rng.integers(1, 6, 2)
+        mask[y*8+1:y*8+1+h, x*8+1:x*8+1+w] = 255
+
+    contours, _ = cv.findContours(mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
+    return contours
+
+def line_mask(number_: int, seed_: int=0) -> np.ndarray:
+    '''
+        用途:
+        畫出直線段與折線的二值影像, 約一半為直線, 一半為折線.
+
+        參數 number_: 線條數量.
+        參數 seed_: 亂數種子.
+    '''
+    rng = np.random.default_rng(seed_)
+    side = int(np.ceil(np.sqrt(number_)))
+    mask = np.zeros((side * 120, side * 120), np.uint8)
+    for i in range(number_):
+        y, x = divmod(i, side)
+        center = np.array((x * 120 + 60, y * 120 + 60))
+        angle = rng.uniform(0, np.pi)
+        length = rng.integers(20, 50)
+        direction = np.array((np.cos(angle), np.sin(angle)))
+        start = center - direction * length
+        end = center + direction * length
+        if i % 2:
+            bend = angle + rng.uniform(0.3, 1.2)
+            end = center + np.array((np.cos(bend), np.sin(bend))) * length
+        points = np.int32([start, center, end])
+        cv.polylines(mask, [points], False, 255, int(rng.integers(4, 10)))
+    return mask
+
+def line_contours(number_: int, seed_: int=0) -> 'tuple[np.ndarray]':
+    '''
+        用途:
+        返回line_mask()的輪廓.
+    '''
+    contours, _ = cv.findContours(line_mask(number_, seed_), cv.RETR_EXTERNAL,
+                                  cv.CHAIN_APPROX_SIMPLE)
+    return contours
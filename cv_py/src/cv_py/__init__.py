@@ -1,10 +1,65 @@
-from .image import SLICE, largest_contour, slice, slice_half
-from .noiseProcess import bilateral, blur, convolution, gaussian, median, morph
-from .recognize import average_point, simple_line_check
-from .trackbar import Trackbar
-
-__all__ = ["SLICE", "largest_contour", "slice", "slice_half",
-           "bilateral", "blur", "convolution", "gaussian", "median", "morph",
-           "average_point", "simple_line_check",
-           "Trackbar",
+import importlib
+from typing import TYPE_CHECKING
+
+# 公開名稱 -> 所在子模組, 第一次取用時才載入該子模組(PEP 562)
+_LAZY = {"profiling": None,
+         "HSVCalibrator": "color", "HSVLookup": "color",
+         "SLICE": "image", "BlobTable": "image", "ContourSet": "image", "ContourTable": "image",
+         "ROITracker": "image",
+         "largest_contour": "image", "slice": "image", "slice_half": "image",
+         "Tile": "image", "tile": "image",
+         "BILATERAL": "noiseProcess", "autotune": "noiseProcess", "autotune_cache": "noiseProcess",
+         "bilateral": "noiseProcess", "blur": "noiseProcess", "convolution": "noiseProcess",
+         "gaussian": "noiseProcess", "median": "noiseProcess", "morph": "noiseProcess",
+         "ContourTracker": "recognize", "average_point": "recognize",
+         "simple_line_check": "recognize", "simple_line_check_batch": "recognize",
+         "FrameGate": "gate",
+         "imap_video": "parallel", "process_tiles": "parallel", "process_video": "parallel",
+         "Pipeline": "pipeline", "PipelineResult": "pipeline", "StageGraph": "pipeline",
+         "PyramidResult": "pyramid", "pyramid_detect": "pyramid", "scale_kernel": "pyramid",
+         "FrameQueue": "stream", "Stream": "stream",
+         "HighGUIBackend": "trackbar", "MemoryBackend": "trackbar", "Trackbar": "trackbar"}
+
+if TYPE_CHECKING:
+    from . import profiling
+    from .color import HSVCalibrator, HSVLookup
+    from .image import (SLICE, BlobTable, ContourSet, ContourTable, ROITracker, Tile,
+                        largest_contour, slice, slice_half, tile)
+    from .noiseProcess import (BILATERAL, autotune, autotune_cache, bilateral, blur, convolution,
+                               gaussian, median, morph)
+    from .gate import FrameGate
+    from .recognize import ContourTracker, average_point, simple_line_check, simple_line_check_batch
+    from .parallel import imap_video, process_tiles, process_video
+    from .pipeline import Pipeline, PipelineResult, StageGraph
+    from .pyramid import PyramidResult, pyramid_detect, scale_kernel
+    from .stream import FrameQueue, Stream
+    from .trackbar import HighGUIBackend, MemoryBackend, Trackbar
+
+def __getattr__(name_: 'str'):
+    if name_ not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name_!r}")
+    module = _LAZY[name_]
+    if module is None:
+        value = importlib.import_module(f".{name_}", __name__)
+    else:
+        value = getattr(importlib.import_module(f".{module}", __name__), name_)
+    globals()[name_] = value
+    return value
+
+def __dir__() -> 'list[str]':
+    return sorted(set(globals()) | set(_LAZY))
+
+__all__ = ["profiling",
+           "HSVCalibrator", "HSVLookup",
+           "SLICE", "BlobTable", "ContourSet", "ContourTable", "ROITracker", "Tile",
+           "largest_contour", "slice", "slice_half", "tile",
+           "BILATERAL", "autotune", "autotune_cache", "bilateral", "blur", "convolution",
+           "gaussian", "median", "morph",
+           "ContourTracker", "average_point", "simple_line_check", "simple_line_check_batch",
+           "FrameGate",
+           "imap_video", "process_tiles", "process_video",
+           "Pipeline", "PipelineResult", "StageGraph",
+           "PyramidResult", "pyramid_detect", "scale_kernel",
+           "FrameQueue", "Stream",
+           "HighGUIBackend", "MemoryBackend", "Trackbar",
            "Mouse"]
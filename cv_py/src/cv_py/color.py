@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+import cv2 as cv
+import numpy as np
+import os
+from typing import Sequence
+from .profiling import profiled
+
+"""
+    尚未定型
+
+    功能:
+    以查表方式做HSV顏色分割, 每幀不需產生HSV影像.
+"""
+
+class HSVLookup:
+    """
+        功能:
+        1. 將一個或多個HSV範圍編譯成BGR到遮罩的查表, 每幀只需一次查表.
+        2. 色相下限大於上限時視為跨越180的範圍, 例如(170, 100, 100)到
+           (10, 255, 255)可同時涵蓋紅色的兩端.
+        3. 範圍未改變時不重建查表, 改變時只重做inRange, 不重算BGR到HSV.
+        4. 可綁定Trackbar群組, 每幀自動讀取範圍.
+
+        量化位元:
+        bits_為每個通道使用的位元數, 查表大小為2^(3*bits_).
+        8位元為預設, 是完整的16M查表, 結果與cvtColor加inRange完全相同,
+        且索引計算最快. 記憶體有限時可用6位元(64^3, 262144格), 誤差在
+        色塊邊界的1~2階內, 但索引需額外的位移運算.
+
+        範例用法:
+        lookup = HSVLookup().bind(HSV, ("min", "max"))\n
+        binary = lookup.apply(frame)
+
+        注意事項:
+        設定cache_dir_時, BGR到HSV的色彩立方體會存成.npy並以記憶體映射
+        載入, 8位元時可省去每次啟動約48MB的轉換.
+    """
+    def __init__(self, range_: 'Sequence[Sequence[Sequence[int]]]' = (), bits_: int=8,
+                 cache_dir_: str=None):
+        '''
+            用途:
+            建立查表.
+
+            參數 range_: HSV範圍序列, 每個元素為(下限, 上限), 可不設定.
+            參數 bits_: 每個通道的量化位元數, 範圍1~8.
+            參數 cache_dir_: 色彩立方體快取資料夾, 可不設定.
+        '''
+        if not 1 <= bits_ <= 8:
+            raise ValueError("Bits must be between 1 and 8")
+
+        self.__bits: 'int' = bits_
+        self.__cube: 'np.ndarray' = self.__hsv_cube(bits_, cache_dir_)
+        shift = 8 - bits_
+        value = np.arange(256, dtype=np.int32) >> shift
+        self.__shift_lut: 'np.ndarray' = np.dstack([value,
+                                                    value << bits_,
+                                                    value << (bits_ * 2)]).reshape(256, 1, 3)
+        self.__bgra: 'np.ndarray' = None
+        self.__index: 'np.ndarray' = None
+        self.__range: 'tuple' = None
+        self.__table: 'np.ndarray' = np.zeros(len(self.__cube), np.uint8)
+        self.__bind: 'list' = []
+        if range_:
+            self.set_range(*range_)
+
+    @staticmethod
+    def __hsv_cube(bits_: int, cache_dir_: str) -> np.ndarray:
+        '''
+            用途:
+            返回所有量化BGR顏色(取格子中心)的HSV值, shape (2^(3*bits_), 1, 3).
+            索引值為b | g << bits_ | r << 2*bits_, 8位元時即為BGRA像素以
+            uint32讀取後去掉alpha的數值.
+        '''
+        path = None
+        if cache_dir_ is not None:
+            path = os.path.join(cache_dir_, f"hsv_cube_{bits_}.npy")
+            if os.path.exists(path):
+                return np.load(path, mmap_mode="r")
+
+        shift = 8 - bits_
+        level = (np.arange(1 << bits_, dtype=np.uint16) << shift) + ((1 << shift) >> 1)
+        r, g, b = np.meshgrid(level, level, level, indexing="ij")
+        bgr = np.stack((b, g, r), axis=-1).astype(np.uint8).reshape(-1, 1, 3)
+        cube = cv.cvtColor(bgr, cv.COLOR_BGR2HSV)
+
+        if path is not None:
+            os.makedirs(cache_dir_, exist_ok=True)
+            np.save(path, cube)
+            return np.load(path, mmap_mode="r")
+        return cube
+
+    def bind(self, trackbar_, *group_: 'Sequence[str]') -> 'HSVLookup':
+        '''
+            用途:
+            綁定Trackbar群組, apply()未給範圍時從中讀取.
+
+            參數 trackbar_: Trackbar物件.
+            參數 group_: (下限群組名, 上限群組名), 可為多組.
+        '''
+        if not group_:
+            group_ = (("min", "max"),)
+        self.__bind.append((trackbar_, tuple(group_)))
+        return self
+
+    def set_range(self, *range_: 'Sequence[Sequence[int]]') -> bool:
+        '''
+            用途:
+            設定HSV範圍, 範圍改變時才重建查表, 返回是否重建.
+
+            參數 range_: 一個或多個(下限, 上限).
+        '''
+        key = tuple((tuple(int(v) for v in lower), tuple(int(v) for v in upper))
+                    for lower, upper in range_)
+        if key == self.__range:
+            return False
+
+        table = np.zeros((len(self.__cube), 1), np.uint8)
+        for lower, upper in key:
+            if len(lower) != 3 or len(upper) != 3:
+                raise ValueError("HSV range should have 3 channels")
+            if lower[0] <= upper[0]:
+                pieces = ((lower, upper),)
+            else:
+                pieces = ((lower, (255,) + upper[1:]), ((0,) + lower[1:], upper))
+            for low, high in pieces:
+                table |= cv.inRange(self.__cube, low, high)
+
+        self.__table = table.ravel()
+        self.__range = key
+        return True
+
+    @profiled
+    def apply(self, frame_: np.ndarray, *range_: 'Sequence[Sequence[int]]',
+              dst: np.ndarray=None) -> np.ndarray:
+        '''
+            用途:
+            對BGR影像查表, 返回0/255的二值遮罩.
+
+            參數 frame_: BGR影像, 型態為uint8.
+            參數 range_: HSV範圍, 未設定則使用綁定的Trackbar或上次設定的範圍.
+            參數 dst: 預先配置的遮罩, shape為frame_的前兩維, 可不設定.
+        '''
+        if range_:
+            self.set_range(*range_)
+        elif self.__bind:
+            bound = []
+            for trackbar, groups in self.__bind:
+                value = trackbar.snapshot()
+                bound.extend((value[lower], value[upper]) for lower, upper in groups)
+            self.set_range(*bound)
+
+        return np.take(self.__table, self.__lookup_index(frame_), out=dst, mode="clip")
+
+    def __lookup_index(self, frame_: np.ndarray) -> np.ndarray:
+        '''
+            用途:
+            計算每個像素在查表中的索引值.
+
+            運作方式:
+            1. 8位元: 轉成BGRA後以小端序uint32讀取, 去掉alpha即為索引值,
+               轉換與遮罩使用預先配置的緩衝區. 指定小端序讀取, 大端序主機
+               上numpy會自動交換位元組, 通道順序不變.
+            2. 其他: 以cv.LUT將各通道量化並位移後相加.
+        '''
+        if self.__bits == 8:
+            if self.__bgra is None or self.__bgra.shape[:2] != frame_.shape[:2]:
+                self.__bgra = np.empty(frame_.shape[:2] + (4,), np.uint8)
+                self.__index = np.empty(frame_.shape[:2], np.uint32)
+            cv.cvtColor(frame_, cv.COLOR_BGR2BGRA, dst=self.__bgra)
+            pixel = self.__bgra.view("<u4")[..., 0]
+            return np.bitwise_and(pixel, 0xFFFFFF, out=self.__index)
+
+        index = cv.LUT(frame_, self.__shift_lut)
+        return index[..., 0] + index[..., 1] + index[..., 2]
+
+    @property
+    def bits(self) -> int:
+        return self.__bits
+
+class HSVCalibrator:
+    """
+        功能:
+        1. 跨幀累積選取區域的三維HSV直方圖(固定格數, uint32計數),
+           以np.bincount對打包後的索引一次累加.
+        2. 由直方圖的各通道邊際分布取百分位數作為範圍, 少數離群像素
+           不會把範圍撐開.
+        3. 色相為環狀, 自動從分布最稀疏處切開, 紅色等跨越0的顏色會
+           得到下限大於上限的範圍, 與HSVLookup的跨越規則相同.
+        4. 可將結果以Trackbar.change_value寫入拉條群組.
+
+        範例用法:
+        calibrator = HSVCalibrator()\n
+        calibrator.update(hsv[y1:y2, x1:x2])\n
+        calibrator.push(HSV, ("min", "max"))
+
+        注意事項:
+        直方圖格數預設為(90, 64, 64), 共約37萬格(1.5MB), 範圍的精度為
+        色相2階、飽和度與亮度4階.
+    """
+    def __init__(self, bins_: 'Sequence[int]' = (90, 64, 64)):
+        '''
+            用途:
+            建立空的直方圖.
+
+            參數 bins_: (色相, 飽和度, 亮度)的格數, 各為1~180, 1~256, 1~256.
+        '''
+        bins = tuple(int(v) for v in bins_)
+        if len(bins) != 3 or not (1 <= bins[0] <= 180 and 1 <= bins[1] <= 256
+                                  and 1 <= bins[2] <= 256):
+            raise ValueError("Bins should be 3 values within (1~180, 1~256, 1~256)")
+
+        self.__bins: 'tuple[int, int, int]' = bins
+        self.__limit: 'tuple[int, int, int]' = (180, 256, 256)
+        level = np.arange(256)
+        self.__lut: 'np.ndarray' = np.dstack(
+            [np.minimum(level * count // limit, count - 1)
+             for count, limit in zip(bins, self.__limit)]).astype(np.uint8).reshape(256, 1, 3)
+        self.__histogram: 'np.ndarray' = np.zeros(bins, np.uint32)
+
+    def reset(self):
+        '''
+            用途:
+            清空直方圖.
+        '''
+        self.__histogram[...] = 0
+
+    def update(self, hsv_: np.ndarray, mask_: np.ndarray=None):
+        '''
+            用途:
+            將HSV影像(或其區域)的像素累加到直方圖.
+
+            參數 hsv_: HSV影像, 型態為uint8.
+            參數 mask_: 遮罩, 只累加非0的像素, 可不設定.
+        '''
+        index = cv.LUT(hsv_, self.__lut)
+        if mask_ is not None:
+            index = index[mask_ > 0]
+        index = index.reshape(-1, 3).astype(np.intp)
+        _, bin_s, bin_v = self.__bins
+        packed = (index[:, 0] * bin_s + index[:, 1]) * bin_v + index[:, 2]
+        count = np.bincount(packed, minlength=self.__histogram.size)
+        self.__histogram.ravel()[:] += count.astype(np.uint32)
+
+    @staticmethod
+    def __percentile(marginal_: np.ndarray, percentile_: 'Sequence[float]') -> 'tuple[int, int]':
+        '''
+            用途:
+            返回累積分布到達上下百分位數的格子索引.
+        '''
+        cumulative = np.cumsum(marginal_, dtype=np.float64)
+        total = cumulative[-1]
+        low = int(np.searchsorted(cumulative, total * percentile_[0] / 100, side="right"))
+        high = int(np.searchsorted(cumulative, total * percentile_[1] / 100, side="left"))
+        return min(low, len(marginal_) - 1), min(max(high, low), len(marginal_) - 1)
+
+    def bounds(self, percentile_: 'Sequence[float]' = (2, 98)
+               ) -> 'tuple[tuple[int, int, int], tuple[int, int, int]] | None':
+        '''
+            用途:
+            返回HSV範圍(下限, 上限), 直方圖為空則回傳None.
+
+            參數 percentile_: (下百分位數, 上百分位數), 範圍0~100.
+
+            運作方式:
+            1. 各通道將直方圖加總成一維邊際分布.
+            2. 色相先找出連續1/4圈總數最少的區間, 從其中心切開後再取
+               百分位數, 映射回原本的色相, 跨越0時下限大於上限.
+            3. 格子索引換回數值時, 下限取格子起點, 上限取格子終點.
+        '''
+        if not self.count:
+            return None
+
+        lower, upper = [], []
+        for axis, (count, limit) in enumerate(zip(self.__bins, self.__limit)):
+            other = tuple(i for i in range(3) if i != axis)
+            marginal = self.__histogram.sum(axis=other, dtype=np.uint64)
+            cut = 0
+            if axis == 0:
+                window = max(count // 4, 1)
+                circular = np.concatenate((marginal, marginal[:window - 1]))
+                moving = np.convolve(circular, np.ones(window), "valid")[:count]
+                cut = (int(np.argmin(moving)) + window // 2) % count
+            low, high = self.__percentile(np.roll(marginal, -cut), percentile_)
+            low, high = (low + cut) % count, (high + cut) % count
+            lower.append(-(-low * limit // count))
+            upper.append(min(-(-(high + 1) * limit // count) - 1, limit - 1))
+
+        return tuple(lower), tuple(upper)
+
+    def push(self, trackbar_, group_: 'Sequence[str]' = ("min", "max"),
+             percentile_: 'Sequence[float]' = (2, 98)) -> bool:
+        '''
+            用途:
+            將bounds()的結果以change_value寫入拉條群組, 返回是否有寫入.
+
+            參數 trackbar_: Trackbar物件.
+            參數 group_: (下限群組名, 上限群組名).
+            參數 percentile_: 同bounds().
+        '''
+        bound = self.bounds(percentile_)
+        if bound is None:
+            return False
+        trackbar_.change_value(group_[0], bound[0])
+        trackbar_.change_value(group_[1], bound[1])
+        return True
+
+    @property
+    def count(self) -> int:
+        '''
+            用途:
+            已累加的像素數量.
+        '''
+        return int(self.__histogram.sum(dtype=np.uint64))
+
+    @property
+    def histogram(self) -> np.ndarray:
+        '''
+            用途:
+            直方圖的唯讀視圖, shape為bins_.
+        '''
+        view = self.__histogram.view()
+        view.flags.writeable = False
+        return view
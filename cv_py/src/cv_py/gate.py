@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+import cv2 as cv
+import numpy as np
+from typing import Any, Callable
+from .profiling import profiled
+
+"""
+    尚未定型
+
+    功能:
+    攝影機固定時, 畫面沒有變化就不必重跑二值化、形態學與找輪廓.
+    以縮小後的區塊平均值作為影像簽章, 與上一次處理的影像比較, 沒有
+    區塊變化且參數相同時直接返回上次的結果.
+"""
+
+class FrameGate:
+    """
+        功能:
+        1. 以block_ x block_區塊的平均值(cv.resize的INTER_AREA)作為簽章,
+           VGA影像預設只有40 x 30個區塊, 比較成本遠小於後續處理.
+        2. 任一區塊的平均值差超過threshold_, 或key_(例如Trackbar的數值)
+           改變時視為有變化.
+        3. changed為最近一次檢查的區塊變化遮罩, changed_rect()返回涵蓋所有
+           變化區塊的矩形, 後續階段可只處理該區域.
+        4. stats()返回命中率, 方便調整threshold_與block_.
+
+        範例用法:
+        gate = FrameGate()\n
+        result = gate.process(frame, detect, HSV.snapshot())
+
+        注意事項:
+        1. 簽章是與上一次"有處理"的影像比較, 而非上一幀, 緩慢變化累積超過
+           threshold_後仍會觸發處理.
+        2. key_以==比較, 應使用tuple或dict等數值, 不可放numpy陣列.
+        3. 命中時返回的是同一個結果物件, 呼叫端不應修改它.
+    """
+    def __init__(self, block_: int=16, threshold_: 'int | float' = 4):
+        '''
+            用途:
+            建立閘門.
+
+            參數 block_: 區塊邊長(像素), 至少為1.
+            參數 threshold_: 區塊平均值的最大容許差(灰階值).
+        '''
+        if block_ < 1:
+            raise ValueError("Block size must be greater than 0")
+        self.__block: 'int' = int(block_)
+        self.threshold: 'int | float' = threshold_
+        self.__reference: 'np.ndarray' = None
+        self.__key: 'Any' = None
+        self.__result: 'Any' = None
+        self.__cached: 'bool' = False
+        self.__changed: 'np.ndarray' = None
+        self.__scale: 'tuple[float, float]' = (1.0, 1.0)
+        self.__hit: 'int' = 0
+        self.__miss: 'int' = 0
+
+    def __signature(self, frame_: np.ndarray) -> np.ndarray:
+        '''
+            用途:
+            返回區塊平均值, 多通道時保留各通道.
+        '''
+        height, width = frame_.shape[:2]
+        size = max(width // self.__block, 1), max(height // self.__block, 1)
+        self.__scale = width / size[0], height / size[1]
+        return cv.resize(frame_, size, interpolation=cv.INTER_AREA)
+
+    @profiled
+    def check(self, frame_: np.ndarray, key_: Any=None) -> bool:
+        '''
+            用途:
+            返回frame_是否需要重新處理, 並更新changed.
+            返回True時會以frame_作為之後比較的基準.
+
+            參數 frame_: 輸入影像.
+            參數 key_: 影響處理結果的參數, 改變時一定返回True.
+        '''
+        signature = self.__signature(frame_)
+        reference = self.__reference
+        if reference is None or reference.shape != signature.shape or key_ != self.__key:
+            self.__changed = np.ones(signature.shape[:2], bool)
+        else:
+            diff = cv.absdiff(signature, reference)
+            if diff.ndim == 3:
+                diff = diff.max(axis=2)
+            self.__changed = diff > self.threshold
+
+        if self.__changed.any():
+            self.__reference = signature
+            self.__key = key_
+            return True
+        return False
+
+    def process(self, frame_: np.ndarray, fn_: 'Callable[[np.ndarray], Any]',
+                key_: Any=None) -> Any:
+        '''
+            用途:
+            畫面有變化時返回fn_(frame_)並快取, 否則返回快取的結果.
+
+            參數 frame_: 輸入影像.
+            參數 fn_: 處理函式.
+            參數 key_: 同check().
+        '''
+        if self.check(frame_, key_) or not self.__cached:
+            self.__result = fn_(frame_)
+            self.__cached = True
+            self.__miss += 1
+        else:
+            self.__hit += 1
+        return self.__result
+
+    def changed_rect(self) -> 'tuple[int, int, int, int] | None':
+        '''
+            用途:
+            返回涵蓋所有變化區塊的(x, y, w, h), 沒有變化則返回None.
+        '''
+        if self.__changed is None:
+            return None
+        row, col = np.nonzero(self.__changed)
+        if not len(row):
+            return None
+        scale_x, scale_y = self.__scale
+        x, y = int(col.min() * scale_x), int(row.min() * scale_y)
+        return (x, y, int(round((col.max() + 1) * scale_x)) - x,
+                int(round((row.max() + 1) * scale_y)) - y)
+
+    def reset(self):
+        '''
+            用途:
+            清除基準影像、快取結果與統計, 下一幀一定會處理.
+        '''
+        self.__reference = self.__key = self.__result = self.__changed = None
+        self.__cached = False
+        self.__hit = self.__miss = 0
+
+    def stats(self) -> 'dict[str, float]':
+        '''
+            用途:
+            返回process()的命中次數、處理次數與命中率.
+        '''
+        total = self.__hit + self.__miss
+        return {"frames": total, "hit": self.__hit, "miss": self.__miss,
+                "hit_rate": self.__hit / total if total else 0.0}
+
+    @property
+    def changed(self) -> 'np.ndarray | None':
+        '''
+            用途:
+            最近一次check()的區塊變化遮罩, shape為(列數, 行數).
+        '''
+        return self.__changed
+
+    @property
+    def block(self) -> int:
+        return self.__block
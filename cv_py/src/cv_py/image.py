@@ -2,6 +2,8 @@
 import cv2 as cv
 import numpy as np
 from enum import IntEnum
+from typing import NamedTuple, Sequence
+from .profiling import profiled
 
 """
     尚未定型
@@ -23,51 +25,631 @@ class SLICE(IntEnum):
     SLICE_SHORTEST = 2
     SLICE_LONGEST = 3
 
+class ContourTable:
+    """
+        功能:
+        1. 以findContours的結果一次計算所有輪廓的幾何資料, 之後的篩選
+           與辨識直接查表, 不必重複呼叫openCV.
+        2. 資料以欄位陣列儲存(struct of arrays), 第i列對應contours[i].
+        3. 旋轉矩形(minAreaRect)成本較高, 僅在第一次查詢時計算並快取.
+
+        欄位:
+        contours: 原始輪廓元組.
+        area: 面積, shape (N,).
+        bbox: 外接矩形(x, y, w, h), shape (N, 4).
+        centroid: 質心(x, y), 面積為0時以外接矩形中心代替, shape (N, 2).
+        perimeter: 封閉周長, shape (N,).
+
+        範例用法:
+        contours, _ = cv.findContours(...)\n
+        table = ContourTable(contours)\n
+        index = largest_contour(table, 1000, 2)
+    """
+    def __init__(self, contours_: 'Sequence[np.ndarray]'):
+        '''
+            用途:
+            建立輪廓資料表.
+
+            參數 contours_: findContours返回的輪廓.
+        '''
+        self.contours: 'tuple[np.ndarray]' = tuple(contours_)
+        number = len(self.contours)
+        self.area: 'np.ndarray' = np.empty(number, np.float64)
+        self.bbox: 'np.ndarray' = np.empty((number, 4), np.int32)
+        self.centroid: 'np.ndarray' = np.empty((number, 2), np.float64)
+        self.perimeter: 'np.ndarray' = np.empty(number, np.float64)
+        self.__min_rect: 'np.ndarray' = np.full((number, 5), np.nan)
+
+        for i, contour in enumerate(self.contours):
+            moment = cv.moments(contour)
+            self.area[i] = moment["m00"]
+            self.bbox[i] = cv.boundingRect(contour)
+            self.perimeter[i] = cv.arcLength(contour, True)
+            if moment["m00"]:
+                self.centroid[i] = moment["m10"] / moment["m00"], moment["m01"] / moment["m00"]
+            else:
+                x, y, w, h = self.bbox[i]
+                self.centroid[i] = x + w / 2, y + h / 2
+
+    def __len__(self) -> int:
+        return len(self.contours)
+
+    def __getitem__(self, index_: int) -> np.ndarray:
+        return self.contours[index_]
+
+    @property
+    def aspect_ratio(self) -> np.ndarray:
+        '''
+            用途:
+            外接矩形長邊與短邊之比, 恆大於等於1.
+        '''
+        side = self.bbox[:, 2:].astype(np.float64)
+        return side.max(axis=1) / np.maximum(side.min(axis=1), 1)
+
+    @property
+    def extent(self) -> np.ndarray:
+        '''
+            用途:
+            輪廓面積佔外接矩形面積之比例.
+        '''
+        return self.area / np.maximum(self.bbox[:, 2] * self.bbox[:, 3], 1)
+
+    def min_area_rect(self, index_: int) -> tuple:
+        '''
+            用途:
+            返回輪廓的旋轉矩形, 格式同cv.minAreaRect, 首次查詢才計算.
+
+            參數 index_: 輪廓索引值.
+        '''
+        rect = self.__min_rect[index_]
+        if np.isnan(rect[0]):
+            (cx, cy), (w, h), angle = cv.minAreaRect(self.contours[index_])
+            rect[:] = cx, cy, w, h, angle
+        cx, cy, w, h, angle = rect.tolist()
+        return (cx, cy), (w, h), angle
+
+    def min_area_rects(self, index_: 'Sequence[int]' = None) -> np.ndarray:
+        '''
+            用途:
+            一次返回多個旋轉矩形, 每列為(cx, cy, w, h, angle).
+
+            參數 index_: 輪廓索引值, 若未指定, 則返回全部.
+        '''
+        if index_ is None:
+            index_ = range(len(self))
+        for i in index_:
+            self.min_area_rect(i)
+        return self.__min_rect[list(index_)]
+
+    def filter(self, area_range_: 'Sequence[float]' = None,
+               aspect_range_: 'Sequence[float]' = None,
+               extent_range_: 'Sequence[float]' = None) -> np.ndarray:
+        '''
+            用途:
+            以面積、長寬比和填充率篩選輪廓, 返回符合條件的索引值陣列.
+
+            參數 area_range_: 面積範圍(最小, 最大), 可不設定.
+            參數 aspect_range_: 長寬比範圍(最小, 最大), 可不設定.
+            參數 extent_range_: 填充率範圍(最小, 最大), 可不設定.
+
+            注意事項:
+            範圍包含上下限, 上限可用np.inf表示不限制.
+        '''
+        keep = np.ones(len(self), bool)
+        for column, limit in ((self.area, area_range_),
+                              (self.aspect_ratio, aspect_range_),
+                              (self.extent, extent_range_)):
+            if limit is not None:
+                keep &= (column >= limit[0]) & (column <= limit[1])
+        return np.flatnonzero(keep)
+
+    def largest(self, area_threshold_: 'int | float'=0,
+                number_found_: int=1) -> 'tuple[int]':
+        '''
+            用途:
+            同largest_contour, 但直接使用表中面積.
+        '''
+        return largest_contour(self, area_threshold_, number_found_)
+
+class ContourSet:
+    """
+        功能:
+        1. 以一塊連續的int32座標陣列加上起始位置陣列儲存多個輪廓,
+           取用第i個輪廓時返回視圖(不複製), 形狀同findContours的輪廓.
+        2. 面積、外接矩形與質心以np.add.reduceat等一次計算所有輪廓,
+           第一次取用時計算並快取.
+        3. 可轉成一塊連續的位元組緩衝區, 適合跨行程傳遞或np.save後
+           以記憶體映射載入.
+        4. 可直接傳入largest_contour與simple_line_check_batch.
+
+        欄位:
+        points: 所有輪廓的座標(x, y), shape (P, 2).
+        offsets: 各輪廓在points中的起始位置, 最後一個為P, shape (N + 1,).
+
+        範例用法:
+        contours, _ = cv.findContours(...)\n
+        contour_set = ContourSet.from_contours(contours)\n
+        index = largest_contour(contour_set, 1000, 2)\n
+        contour = contour_set[index[0]]
+    """
+    def __init__(self, points_: np.ndarray, offsets_: np.ndarray):
+        '''
+            用途:
+            以座標陣列與起始位置陣列建立, 不複製資料.
+
+            參數 points_: 座標陣列, 可reshape成(P, 2)的int32陣列.
+            參數 offsets_: 起始位置陣列, 第一個為0, 最後一個為P.
+        '''
+        self.points: 'np.ndarray' = np.asarray(points_, np.int32).reshape(-1, 2)
+        self.offsets: 'np.ndarray' = np.asarray(offsets_, np.int64)
+        if self.offsets.ndim != 1 or not len(self.offsets) or self.offsets[0] != 0 \
+                or self.offsets[-1] != len(self.points) or np.any(np.diff(self.offsets) < 0):
+            raise ValueError("Offsets must start at 0, end at the number of points "
+                             "and never decrease")
+        self.__cache: 'dict[str, np.ndarray]' = {}
+
+    @classmethod
+    def from_contours(cls, contours_: 'Sequence[np.ndarray]') -> 'ContourSet':
+        '''
+            用途:
+            由findContours的輪廓序列建立.
+
+            參數 contours_: 輪廓序列.
+        '''
+        length = np.fromiter((len(contour) for contour in contours_), np.int64,
+                             count=len(contours_))
+        offsets = np.zeros(len(length) + 1, np.int64)
+        np.cumsum(length, out=offsets[1:])
+        if not len(contours_):
+            return cls(np.empty((0, 2), np.int32), offsets)
+        points = np.concatenate([contour.reshape(-1, 2) for contour in contours_])
+        return cls(points.astype(np.int32, copy=False), offsets)
+
+    def to_contours(self) -> 'tuple[np.ndarray]':
+        '''
+            用途:
+            轉成findContours格式的輪廓元組, 每個輪廓為points的視圖.
+        '''
+        return tuple(self[i] for i in range(len(self)))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index_: int) -> np.ndarray:
+        index_ = range(len(self))[index_]
+        return self.points[self.offsets[index_]:self.offsets[index_ + 1]].reshape(-1, 1, 2)
+
+    def __iter__(self):
+        return iter(self.to_contours())
+
+    def __getstate__(self) -> dict:
+        return {"points": self.points, "offsets": self.offsets}
+
+    def __setstate__(self, state_: dict):
+        self.__init__(state_["points"], state_["offsets"])
+
+    def to_buffer(self) -> np.ndarray:
+        '''
+            用途:
+            返回一塊連續的uint8緩衝區: [輪廓數, 點數](int64), offsets(int64),
+            points(int32).
+        '''
+        number = len(self)
+        buffer = np.empty(16 + 8 * (number + 1) + self.points.nbytes, np.uint8)
+        buffer[:16].view(np.int64)[:] = number, len(self.points)
+        buffer[16:16 + 8 * (number + 1)].view(np.int64)[:] = self.offsets
+        buffer[16 + 8 * (number + 1):].view(np.int32)[:] = self.points.ravel()
+        return buffer
+
+    @classmethod
+    def from_buffer(cls, buffer_: 'np.ndarray | bytes | memoryview') -> 'ContourSet':
+        '''
+            用途:
+            由to_buffer()的結果建立, 不複製資料(包含記憶體映射的陣列).
+
+            參數 buffer_: to_buffer()的結果或同內容的bytes/memoryview.
+        '''
+        buffer = np.frombuffer(buffer_, np.uint8) if not isinstance(buffer_, np.ndarray) \
+            else buffer_.view(np.uint8).ravel()
+        number, point = buffer[:16].view(np.int64).tolist()
+        start = 16 + 8 * (number + 1)
+        offsets = buffer[16:start].view(np.int64)
+        points = buffer[start:start + 8 * point].view(np.int32).reshape(-1, 2)
+        return cls(points, offsets)
+
+    def save(self, path_: 'str'):
+        '''
+            用途:
+            以np.save存成單一陣列, 可用load()以記憶體映射載入.
+        '''
+        np.save(path_, self.to_buffer())
+
+    @classmethod
+    def load(cls, path_: 'str', mmap_: bool=True) -> 'ContourSet':
+        '''
+            用途:
+            載入save()存的檔案.
+
+            參數 path_: 檔案路徑.
+            參數 mmap_: 是否以記憶體映射載入.
+        '''
+        return cls.from_buffer(np.load(path_, mmap_mode="r" if mmap_ else None))
+
+    def __shoelace(self) -> 'tuple[np.ndarray, np.ndarray, np.ndarray]':
+        '''
+            用途:
+            返回各點與下一點(同一輪廓內循環)的座標, 以及各輪廓是否非空.
+        '''
+        count = len(self.points)
+        following = np.arange(1, count + 1)
+        length = np.diff(self.offsets)
+        last = self.offsets[1:][length > 0] - 1
+        following[last] = self.offsets[:-1][length > 0]
+        point = self.points.astype(np.float64)
+        return point, point[following], length > 0
+
+    def __reduce(self, ufunc_: np.ufunc, value_: np.ndarray, empty_: float) -> np.ndarray:
+        '''
+            用途:
+            以reduceat對每個輪廓做歸約, 空輪廓填入empty_.
+        '''
+        result = np.full((len(self),) + value_.shape[1:], empty_, value_.dtype)
+        nonempty = np.diff(self.offsets) > 0
+        if np.any(nonempty):
+            result[nonempty] = ufunc_.reduceat(value_, self.offsets[:-1][nonempty], axis=0)
+        return result
+
+    @property
+    def signed_area(self) -> np.ndarray:
+        '''
+            用途:
+            各輪廓的有向面積, 同cv.contourArea(contour, True).
+        '''
+        if "signed_area" not in self.__cache:
+            point, following, _ = self.__shoelace()
+            cross = point[:, 0] * following[:, 1] - following[:, 0] * point[:, 1]
+            self.__cache["cross"] = cross
+            self.__cache["signed_area"] = self.__reduce(np.add, cross, 0.0) / 2
+        return self.__cache["signed_area"]
+
+    @property
+    def area(self) -> np.ndarray:
+        '''
+            用途:
+            各輪廓的面積, 同cv.contourArea.
+        '''
+        return np.abs(self.signed_area)
+
+    @property
+    def bbox(self) -> np.ndarray:
+        '''
+            用途:
+            各輪廓的外接矩形(x, y, w, h), 同cv.boundingRect, shape (N, 4).
+        '''
+        if "bbox" not in self.__cache:
+            low = self.__reduce(np.minimum, self.points, 0)
+            high = self.__reduce(np.maximum, self.points, -1)
+            self.__cache["bbox"] = np.hstack((low, high - low + 1)).astype(np.int32)
+        return self.__cache["bbox"]
+
+    @property
+    def centroid(self) -> np.ndarray:
+        '''
+            用途:
+            各輪廓的質心(x, y), 面積為0時以外接矩形中心代替, 同ContourTable.
+        '''
+        if "centroid" not in self.__cache:
+            signed_area = self.signed_area
+            point, following, _ = self.__shoelace()
+            moment = (point + following) * self.__cache["cross"][:, None]
+            moment = self.__reduce(np.add, moment, 0.0)
+            x, y, w, h = self.bbox.T
+            centroid = np.column_stack((x + w / 2, y + h / 2))
+            valid = signed_area != 0
+            centroid[valid] = moment[valid] / (6 * signed_area[valid, None])
+            self.__cache["centroid"] = centroid
+        return self.__cache["centroid"]
+
+class BlobTable:
+    """
+        功能:
+        1. 以cv.connectedComponentsWithStats一次取得所有色塊的面積、外接
+           矩形與質心, 不需對整張影像找輪廓.
+        2. 篩選與排序在NumPy中完成, 只有被取用的色塊才在其外接矩形內
+           追蹤輪廓, 結果快取.
+        3. 可直接傳入largest_contour, 索引值與排序規則與輪廓相同, 以
+           table[i]取得第i個色塊的輪廓.
+
+        欄位:
+        labels: 標籤影像, 色塊i的標籤值為i + 1, 0為背景.
+        area: 像素數量, shape (N,).
+        bbox: 外接矩形(x, y, w, h), shape (N, 4).
+        centroid: 質心(x, y), shape (N, 2).
+
+        注意事項:
+        1. 面積為像素數量, 比同一色塊的cv.contourArea大(輪廓面積以像素
+           中心連線計算, 約少半圈周長), 門檻值需略為調高.
+        2. 標籤影像需掃過整張影像, 色塊很少時findContours較快, 雜點
+           成千上萬時才有明顯優勢, 見benchmarks/blob.py.
+
+        範例用法:
+        blobs = BlobTable(binary)\n
+        index = largest_contour(blobs, 1000, 2)\n
+        contour = blobs[index[0]]
+    """
+    def __init__(self, binary_: np.ndarray, connectivity_: int=8):
+        '''
+            用途:
+            建立色塊資料表.
+
+            參數 binary_: 二值影像, 非0為前景.
+            參數 connectivity_: 連通方式, 4或8.
+        '''
+        _, self.labels, stats, centroid = cv.connectedComponentsWithStats(
+            binary_, connectivity=connectivity_, ltype=cv.CV_32S)
+        self.area: 'np.ndarray' = stats[1:, cv.CC_STAT_AREA].astype(np.float64)
+        self.bbox: 'np.ndarray' = stats[1:, :cv.CC_STAT_AREA]
+        self.centroid: 'np.ndarray' = centroid[1:]
+        self.__contour: 'dict[int, np.ndarray]' = {}
+
+    def __len__(self) -> int:
+        return len(self.area)
+
+    def __getitem__(self, index_: int) -> np.ndarray:
+        '''
+            用途:
+            返回色塊的外輪廓, 整張影像座標, 首次取用才計算.
+
+            參數 index_: 色塊索引值.
+        '''
+        index_ = range(len(self))[index_]
+        contour = self.__contour.get(index_)
+        if contour is None:
+            x, y, w, h = self.bbox[index_].tolist()
+            mask = cv.compare(self.labels[y:y+h, x:x+w], index_ + 1, cv.CMP_EQ)
+            contours, _ = cv.findContours(mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE,
+                                          offset=(x, y))
+            contour = self.__contour[index_] = max(contours, key=len)
+        return contour
+
+    def contours(self, index_: 'Sequence[int]' = None) -> 'tuple[np.ndarray]':
+        '''
+            用途:
+            返回多個色塊的外輪廓.
+
+            參數 index_: 色塊索引值, 若未指定, 則返回全部.
+        '''
+        if index_ is None:
+            index_ = range(len(self))
+        return tuple(self[i] for i in index_)
+
+    def largest(self, area_threshold_: 'int | float'=0,
+                number_found_: int=1) -> 'tuple[int]':
+        '''
+            用途:
+            同largest_contour, 以像素數量為面積.
+        '''
+        return largest_contour(self, area_threshold_, number_found_)
+
+class ROITracker:
+    """
+        功能:
+        1. 以上一幀目標的外接矩形向外擴張成處理視窗, 下一幀只處理視窗內
+           的影像, 目標小且移動慢時可大幅減少二值化、型態學和輪廓運算.
+        2. 找輪廓時自動加上視窗偏移, 輪廓座標與整張影像一致.
+        3. 以下情況會改回整張影像重新搜尋:
+           a. 尚未鎖定或上一幀遺失目標.
+           b. 每隔refresh_幀定期重新搜尋, 避免錯過新出現的目標.
+           c. 目標碰到視窗邊界, 可能被裁切或即將移出視窗.
+
+        範例用法:
+        tracker = ROITracker()\n
+        roi = tracker.crop(frame)\n
+        binary = cv.inRange(cv.cvtColor(roi, cv.COLOR_BGR2HSV), lower, upper)\n
+        contours = tracker.find_contours(binary)\n
+        index = largest_contour(contours, 1000, 1)\n
+        tracker.update(cv.boundingRect(contours[index[0]]) if index else None)
+    """
+    def __init__(self, margin_: float=0.5, min_margin_: int=16, refresh_: int=30):
+        '''
+            用途:
+            建立追蹤器.
+
+            參數 margin_: 視窗向外擴張的比例, 以外接矩形長邊計算.
+            參數 min_margin_: 視窗向外擴張的最小像素.
+            參數 refresh_: 每隔幾幀整張重新搜尋, 小於1則不定期重新搜尋.
+        '''
+        self.__margin: 'float' = margin_
+        self.__min_margin: 'int' = min_margin_
+        self.__refresh: 'int' = refresh_
+        self.__rect: 'tuple[int, int, int, int]' = None
+        self.__window: 'tuple[int, int, int, int]' = None
+        self.__shape: 'tuple[int, int]' = None
+        self.__frame_count: 'int' = 0
+
+    @property
+    def locked(self) -> bool:
+        '''
+            用途:
+            是否已鎖定目標, 鎖定時下一幀只處理視窗內的影像.
+        '''
+        return self.__rect is not None
+
+    @property
+    def offset(self) -> 'tuple[int, int]':
+        '''
+            用途:
+            本幀處理視窗左上角在整張影像中的座標.
+        '''
+        return self.__window[:2]
+
+    @property
+    def window(self) -> 'tuple[int, int, int, int]':
+        '''
+            用途:
+            本幀處理視窗(x, y, w, h).
+        '''
+        return self.__window
+
+    def crop(self, img_: np.ndarray) -> np.ndarray:
+        '''
+            用途:
+            決定本幀處理視窗, 並返回該區域的影像視圖(不複製).
+
+            參數 img_: 整張影像.
+        '''
+        height, width = self.__shape = img_.shape[:2]
+        refresh = self.__refresh > 0 and self.__frame_count % self.__refresh == 0
+        self.__frame_count += 1
+        if self.__rect is None or refresh:
+            self.__window = 0, 0, width, height
+        else:
+            x, y, w, h = self.__rect
+            pad = max(int(max(w, h) * self.__margin), self.__min_margin)
+            x1, y1 = max(x - pad, 0), max(y - pad, 0)
+            x2, y2 = min(x + w + pad, width), min(y + h + pad, height)
+            self.__window = x1, y1, x2 - x1, y2 - y1
+
+        x, y, w, h = self.__window
+        return img_[y:y+h, x:x+w]
+
+    @profiled
+    def find_contours(self, binary_: np.ndarray, mode_: int=cv.RETR_EXTERNAL,
+                      method_: int=cv.CHAIN_APPROX_SIMPLE) -> 'tuple[np.ndarray]':
+        '''
+            用途:
+            對視窗內的二值影像找輪廓, 並轉換成整張影像的座標.
+
+            參數 binary_: crop()所得區域處理後的二值影像.
+            參數 mode_: 輪廓檢索模式.
+            參數 method_: 輪廓近似方法.
+        '''
+        contours, _ = cv.findContours(binary_, mode_, method_, offset=self.offset)
+        return contours
+
+    def update(self, rect_: 'Sequence[int] | None'):
+        '''
+            用途:
+            以本幀目標的外接矩形更新追蹤狀態.
+
+            參數 rect_: 目標外接矩形(x, y, w, h), 整張影像座標, 遺失目標則為None.
+
+            注意事項:
+            目標碰到視窗邊界(且該邊不是影像邊界)時, 下一幀改為整張搜尋.
+        '''
+        if rect_ is None:
+            self.__rect = None
+            return
+
+        x, y, w, h = (int(v) for v in rect_)
+        wx, wy, ww, wh = self.__window
+        height, width = self.__shape
+        touch = (x <= wx and wx > 0) or (y <= wy and wy > 0) \
+                or (x + w >= wx + ww and wx + ww < width) \
+                or (y + h >= wy + wh and wy + wh < height)
+        self.__rect = None if touch else (x, y, w, h)
+
+@profiled
 def largest_contour(contours_: np.ndarray , area_threshold_: 'int | float'=0,
                          number_found_: int=1) -> 'tuple[int]':
     '''
         用途:
         找尋前幾個像素面積最大的輪廓, 並返回其索引值, 若面積為空, 則回傳None.
 
-        參數 contours_: 輪廓, 可為單個或多個.
+        參數 contours_: 輪廓, 可為單個或多個, 亦可為ContourTable、ContourSet或BlobTable.
         參數 area_threshold_: 輪廓最小容許面積.
         參數 number_found_: 返回的最大輪廓數量, 小於1則不限制數量.
+
+        運作方式:
+        1. 一次計算所有輪廓面積並存入預先配置的陣列.
+        2. 以np.argpartition挑出前number_found_大的候選, 再以穩定排序
+           決定順序, 面積相同時索引值較小者在前.
     '''
     if not contours_:
         return None
 
-    contour_info = np.array([0, 0])
-    isContour = False
-    for i, contour in enumerate(contours_):
-        area = cv.contourArea(contour)
-        if area >= area_threshold_:
-            contour_info = np.vstack((contour_info, (i, area)))
-            isContour = True
-    
-    contour_info = np.delete(contour_info, 0, axis=0)
-
-    if not isContour:
+    if isinstance(contours_, (ContourTable, ContourSet, BlobTable)):
+        return _rank_area(contours_.area, area_threshold_, number_found_)
+
+    areas = np.fromiter((cv.contourArea(contour) for contour in contours_),
+                        dtype=np.float64, count=len(contours_))
+    return _rank_area(areas, area_threshold_, number_found_)
+
+def _rank_area(areas_: np.ndarray, area_threshold_: 'int | float',
+               number_found_: int) -> 'tuple[int]':
+    '''
+        用途:
+        依面積由大到小返回符合門檻的索引值, 若皆不符合, 則回傳None.
+
+        參數 areas_: 各輪廓面積, 一維陣列.
+        參數 area_threshold_: 最小容許面積.
+        參數 number_found_: 返回的最大數量, 小於1則不限制數量.
+    '''
+    candidate = np.flatnonzero(areas_ >= area_threshold_)
+    if not candidate.size:
         return None
-    
-    largest_contour_index = np.array([], dtype=int)
+
+    candidate_area = areas_[candidate]
+    if 0 < number_found_ < candidate.size:
+        # 只保留面積不小於第number_found_大的候選, 以維持同面積時的索引順序
+        kth = np.partition(candidate_area, candidate.size - number_found_)
+        keep = candidate_area >= kth[candidate.size - number_found_]
+        candidate, candidate_area = candidate[keep], candidate_area[keep]
+
+    order = np.argsort(-candidate_area, kind="stable")
     if number_found_ > 0:
-        while contour_info.size and number_found_ > 0:
-            largest_area = contour_info.max(axis=0)[1]
-            largest_area_index = int(contour_info.flatten().tolist().index(largest_area) / 2)
-            largest_contour_index = np.hstack((largest_contour_index,
-                                               (int(contour_info[largest_area_index][0]))))
-            contour_info = np.delete(contour_info, largest_area_index, axis=0)
-            number_found_ -= 1
-
-    else:
-        while contour_info.size:
-            largest_area = contour_info.max(axis=0)[1]
-            largest_area_index = int(contour_info.flatten().tolist().index(largest_area) / 2)
-            largest_contour_index = np.hstack((largest_contour_index,
-                                               (int(contour_info[largest_area_index][0]))))
-            contour_info = np.delete(contour_info, largest_area_index, axis=0)
-
-    return tuple(largest_contour_index.tolist())
+        order = order[:number_found_]
+
+    return tuple(candidate[order].tolist())
+
+class Tile(NamedTuple):
+    '''
+        用途:
+        tile()的返回值.
+
+        image: 含重疊區域的影像視圖(不複製).
+        offset: image左上角在整張影像中的座標(x, y).
+        core: 不含重疊區域的範圍(x, y, w, h), 整張影像座標. 所有tile的
+              core互不重疊且剛好覆蓋整張影像.
+    '''
+    image: np.ndarray
+    offset: 'tuple[int, int]'
+    core: 'tuple[int, int, int, int]'
+
+def tile(img_: np.ndarray, rows_: int, cols_: int, overlap_: int=0) -> 'tuple[Tile]':
+    '''
+        用途:
+        將影像切成rows_ x cols_塊, 返回各塊的視圖與位置, 依列優先排列.
+
+        參數 img_: 輸入影像.
+        參數 rows_: 垂直方向的塊數.
+        參數 cols_: 水平方向的塊數.
+        參數 overlap_: 每塊向四周延伸的像素, 超出影像邊界的部分會被截掉.
+
+        注意事項:
+        濾波時overlap_至少為內核半徑, 各塊core內的結果才會與整張影像
+        處理相同.
+
+        範例用法:
+        for view, (x, y), core in tile(frame, 2, 2, 8):\n
+            ...
+    '''
+    if rows_ < 1 or cols_ < 1:
+        raise ValueError("Number of rows and columns must be at least 1")
+    if overlap_ < 0:
+        raise ValueError("Overlap must not be negative")
+
+    height, width = img_.shape[:2]
+    row_edge = np.arange(rows_ + 1) * height // rows_
+    col_edge = np.arange(cols_ + 1) * width // cols_
+    result = []
+    for y1, y2 in zip(row_edge[:-1].tolist(), row_edge[1:].tolist()):
+        for x1, x2 in zip(col_edge[:-1].tolist(), col_edge[1:].tolist()):
+            top, left = max(y1 - overlap_, 0), max(x1 - overlap_, 0)
+            bottom, right = min(y2 + overlap_, height), min(x2 + overlap_, width)
+            result.append(Tile(img_[top:bottom, left:right], (left, top),
+                               (x1, y1, x2 - x1, y2 - y1)))
+    return tuple(result)
 
 def slice(img_: np.ndarray, index_: int, direction_: SLICE) -> 'tuple[np.ndarray, np.ndarray]':
     '''
@@ -1,7 +1,15 @@
 #!/usr/bin/env python3
 import cv2 as cv
 import numpy as np
-from typing import Sequence
+import json
+import os
+import threading
+import time
+from enum import IntEnum
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Callable, Mapping, Sequence
+from .profiling import profiled
 
 """
     尚未定型
@@ -10,32 +18,144 @@ from typing import Sequence
     影像模糊處理與形態學處理
 """
 
-def bilateral(src, distance: int, sigma_color: int, sigma_space: int):
+class BILATERAL(IntEnum):
+    '''
+        用途:
+        定義bilateral()的計算方式.
+
+        BILATERAL_EXACT: 直接呼叫cv.bilateralFilter.
+        BILATERAL_TILED: 分塊多執行緒, 結果與EXACT相同. 不一定較快:
+                         cv.bilateralFilter內部已使用openCV的執行緒, 分塊
+                         還要多算重疊邊界, 720p單核心實測約為EXACT的1.16倍
+                         時間(620.8 ms對535.3 ms), 使用前請以
+                         benchmarks/bilateral.py在目標機器上確認.
+        BILATERAL_DOWNSAMPLE: 縮小後濾波再放大, 計算量約為quality平方倍.
+        BILATERAL_GRID: 雙邊網格近似, sigma越大越快, 適合大sigma.
+    '''
+    BILATERAL_EXACT = 0
+    BILATERAL_TILED = 1
+    BILATERAL_DOWNSAMPLE = 2
+    BILATERAL_GRID = 3
+
+@profiled
+def bilateral(src, distance: int, sigma_color: int, sigma_space: int,
+              mode: BILATERAL=BILATERAL.BILATERAL_EXACT, quality: float=0.5,
+              workers: int=None):
+    '''
+        用途:
+        雙邊濾波, 可選擇較快的計算方式.
+
+        參數 src: 輸入影像, uint8灰階或BGR.
+        參數 distance: 鄰域直徑, 小於等於0時由sigma_space決定.
+        參數 sigma_color: 顏色差異的標準差.
+        參數 sigma_space: 空間距離的標準差.
+        參數 mode: 計算方式, 預設為BILATERAL_EXACT.
+        參數 quality: BILATERAL_DOWNSAMPLE的縮放比例, 範圍(0, 1].
+        參數 workers: BILATERAL_TILED的執行緒數量, 預設為CPU核心數.
+
+        注意事項:
+        1. BILATERAL_DOWNSAMPLE與BILATERAL_GRID為近似, 與EXACT的誤差見
+           benchmarks/bilateral.py的PSNR報告.
+        2. BILATERAL_GRID對彩色影像的每個通道分別濾波, 以該通道本身判斷
+           邊緣, 而不是cv.bilateralFilter的三通道色彩距離.
+        3. BILATERAL_GRID在distance大於0時, 空間標準差不超過distance / 2,
+           近似cv.bilateralFilter的鄰域限制.
+        4. BILATERAL_GRID與cv.bilateralFilter相同, sigma小於等於0時視為1.
+           網格z切片攤平後的寬度達到cv.remap上限(SHRT_MAX)時, 即sigma
+           相對影像太小, 網格沒有加速效果, 改用EXACT計算.
+    '''
+    if mode == BILATERAL.BILATERAL_TILED:
+        # 延後載入, 只用其他濾波時不需要載入multiprocessing
+        from .parallel import process_tiles
+        workers = workers or os.cpu_count() or 1
+        radius = distance // 2 if distance > 0 else int(round(sigma_space * 1.5))
+        return process_tiles(src, lambda view: cv.bilateralFilter(view, distance, sigma_color,
+                                                                  sigma_space),
+                             workers, 1, radius, workers)
+
+    if mode == BILATERAL.BILATERAL_DOWNSAMPLE:
+        if not 0 < quality <= 1:
+            raise ValueError("Quality must be in (0, 1]")
+        height, width = src.shape[:2]
+        small = cv.resize(src, None, fx=quality, fy=quality, interpolation=cv.INTER_AREA)
+        small_distance = max(int(round(distance * quality)), 1) if distance > 0 else distance
+        small = cv.bilateralFilter(small, small_distance, sigma_color, sigma_space * quality)
+        return cv.resize(small, (width, height), interpolation=cv.INTER_LINEAR)
+
+    if mode == BILATERAL.BILATERAL_GRID:
+        if src.dtype != np.uint8:
+            raise TypeError("Bilateral grid only supports uint8 images")
+        sigma_color = sigma_color if sigma_color > 0 else 1
+        sigma_space = sigma_space if sigma_space > 0 else 1
+        if distance > 0:
+            sigma_space = min(sigma_space, distance / 2)
+        grid_d, _, grid_w = _grid_size(src.shape[:2], sigma_color, sigma_space)
+        if grid_d * grid_w >= _SHRT_MAX:
+            return cv.bilateralFilter(src, distance, sigma_color, sigma_space)
+        if src.ndim == 2:
+            return _bilateral_grid(src, sigma_color, sigma_space)
+        return cv.merge([_bilateral_grid(layer, sigma_color, sigma_space)
+                         for layer in cv.split(src)])
+
     bilate = cv.bilateralFilter(src, distance, sigma_color, sigma_space)
     return bilate
 
+@profiled
 def blur(src: np.ndarray, k_size: int):
+    if _TUNER.enabled:
+        return _TUNER.run("blur", src, k_size)
     kernel_aver = k_size, k_size
     average = cv.blur(src, kernel_aver)
     return average
 
-def convolution(src: np.ndarray, k_size: int):
-    kernel_conv = np.ones((k_size, k_size)) / k_size ** 2
-    convolution = cv.filter2D(src, -1, kernel_conv)
-    return convolution
+@profiled
+def convolution(src: np.ndarray, k_size: int, kernel: np.ndarray=None):
+    '''
+        用途:
+        以平均內核或自訂內核對影像做卷積.
+
+        參數 src: 輸入影像.
+        參數 k_size: 平均內核大小, 有設定kernel時不使用.
+        參數 kernel: 自訂二維內核, 可不設定.
+
+        運作方式:
+        1. 平均內核依(大小, 型態)快取一維內核, 以cv.sepFilter2D分兩次
+           一維卷積, 成本隨k而非k平方成長.
+        2. 自訂內核若秩為1(如高斯內核), 則分解為行列向量後走相同路徑.
+        3. 其餘內核交由cv.filter2D, 內核夠大時openCV內部會改用DFT.
+    '''
+    if kernel is None:
+        if _TUNER.enabled:
+            return _TUNER.run("convolution", src, k_size)
+        kernel_row = _box_kernel(k_size, _kernel_dtype(src))
+        return cv.sepFilter2D(src, -1, kernel_row, kernel_row)
 
-def gaussian(src: np.ndarray, k_size: int, sigmaX: float=0, sigmaY: float=0):
-    gauss_blur = cv.GaussianBlur(src, (k_size,)*2, sigmaX, sigmaY)
+    separable = _separate(kernel.tobytes(), kernel.shape, kernel.dtype.str)
+    if separable is None:
+        return cv.filter2D(src, -1, kernel)
+    kernel_row, kernel_column = separable
+    return cv.sepFilter2D(src, -1, kernel_row, kernel_column)
+
+@profiled
+def gaussian(src: np.ndarray, k_size: int, sigmaX: float=0, sigmaY: float=0,
+             dst: np.ndarray=None):
+    if _TUNER.enabled and sigmaX == 0 and sigmaY == 0:
+        return _TUNER.run("gaussian", src, k_size, dst)
+    gauss_blur = cv.GaussianBlur(src, (k_size,)*2, sigmaX, dst=dst, sigmaY=sigmaY)
     return gauss_blur
 
-def median(src: np.ndarray, k_size: int):
-    median = cv.medianBlur(src, k_size)
+@profiled
+def median(src: np.ndarray, k_size: int, dst: np.ndarray=None):
+    if _TUNER.enabled:
+        return _TUNER.run("median", src, k_size, dst)
+    median = cv.medianBlur(src, k_size, dst=dst)
     return median
 
+@profiled
 def morph(img_: 'np.ndarray', method_: 'int | Sequence',
                 kernel_size_: 'int | Sequence',
                 kernel_shape_: 'int | Sequence' = cv.MORPH_RECT,
-                iterations: int=1) -> np.ndarray:
+                iterations: int=1, dst: 'Sequence[np.ndarray]' = None) -> np.ndarray:
     '''
         用途:
         以給定順序、方法和內核大小對影像做多次型態學處理.
@@ -45,6 +165,16 @@ def morph(img_: 'np.ndarray', method_: 'int | Sequence',
         參數 kernel_size_: 內核大小.
         參數 kernel_shape_: 內核形狀, 預設為cv.MORPH_RECT.
         參數 iterations: 執行次數, 預設為1
+        參數 dst: 兩張與輸入影像同尺寸、同型態的預先配置影像, 各階段
+                  輪流寫入, 可不設定.
+
+        注意事項:
+        1. 輸入序列時, 每個階段的輸出為下一階段的輸入.
+        2. 若有設定dst, 返回值為dst其中一張影像, 下次呼叫前請勿修改.
+
+        運作方式:
+        1. 內核依(形狀, 大小)快取, 不重複建立.
+        2. 相鄰且內核相同的侵蝕或膨脹階段合併為一次呼叫, 次數相加.
     '''
     isSequence = True
     isInt = True
@@ -57,16 +187,380 @@ def morph(img_: 'np.ndarray', method_: 'int | Sequence',
     if not (isSequence or isInt):
         raise TypeError("All types of the last 3 params should be int or Sequence.")
     elif isSequence:
-        if len(method_) != len(kernel_size_) or len(method_) != len(kernel_size_):
+        if len(method_) != len(kernel_size_) or len(method_) != len(kernel_shape_):
             print(len(method_), len(kernel_size_), len(kernel_shape_))
             raise ValueError("Inconsistent amount of input data")
 
+        stages = []
         for option, size, shape in zip(method_, kernel_size_, kernel_shape_):
-            kernel = cv.getStructuringElement(shape, (size,)*2)
-            img = cv.morphologyEx(img_, option, kernel, iterations=iterations)
+            if stages and option in _FUSIBLE and stages[-1][:3] == [option, size, shape]:
+                stages[-1][3] += iterations
+            else:
+                stages.append([option, size, shape, iterations])
     
     else:
-        kernel = cv.getStructuringElement(kernel_shape_, (kernel_size_,)*2)
-        img = cv.morphologyEx(img_, method_, kernel, iterations=iterations)
+        stages = [[method_, kernel_size_, kernel_shape_, iterations]]
+
+    img = img_
+    for i, (option, size, shape, count) in enumerate(stages):
+        kernel = _structuring_element(shape, size)
+        if dst is None:
+            img = cv.morphologyEx(img, option, kernel, iterations=count)
+        else:
+            img = cv.morphologyEx(img, option, kernel, dst=dst[i % 2], iterations=count)
+
+    return img
+
+_BOX_KERNEL: 'dict[tuple[int, np.dtype], np.ndarray]' = {}
+
+def _kernel_dtype(src_: np.ndarray) -> np.dtype:
+    '''
+        用途:
+        依輸入影像型態決定內核精度, float64影像使用float64, 其餘使用float32.
+    '''
+    return np.dtype(np.float64 if src_.dtype == np.float64 else np.float32)
+
+def _box_kernel(size_: int, dtype_: np.dtype) -> np.ndarray:
+    '''
+        用途:
+        返回快取的一維平均內核, 若不存在則建立.
+
+        參數 size_: 內核大小.
+        參數 dtype_: 內核型態.
+    '''
+    key = size_, dtype_
+    if key not in _BOX_KERNEL:
+        _BOX_KERNEL[key] = np.full(size_, 1 / size_, dtype_)
+    return _BOX_KERNEL[key]
+
+@lru_cache(maxsize=64)
+def _separate(data_: bytes, shape_: 'tuple[int, int]',
+              dtype_: str) -> 'tuple[np.ndarray, np.ndarray] | None':
+    '''
+        用途:
+        以奇異值分解檢查內核秩是否為1, 是則返回(行向量, 列向量), 否則回傳None.
+
+        參數 data_: 內核資料位元組, 作為快取鍵值.
+        參數 shape_: 內核形狀.
+        參數 dtype_: 內核型態字串.
+    '''
+    kernel = np.frombuffer(data_, dtype_).reshape(shape_).astype(np.float64)
+    if kernel.ndim != 2:
+        return None
+
+    u, sigma, vt = np.linalg.svd(kernel)
+    if sigma[0] == 0 or (sigma.size > 1 and sigma[1] > sigma[0] * 1e-6):
+        return None
+
+    scale = np.sqrt(sigma[0])
+    return vt[0] * scale, u[:, 0] * scale
+
+_FUSIBLE = (cv.MORPH_ERODE, cv.MORPH_DILATE)
+_STRUCTURING_ELEMENT: 'dict[tuple[int, int], np.ndarray]' = {}
+
+def _structuring_element(shape_: int, size_: int) -> np.ndarray:
+    '''
+        用途:
+        返回快取的結構元素, 若不存在則建立.
+
+        參數 shape_: 內核形狀.
+        參數 size_: 內核大小.
+    '''
+    key = shape_, size_
+    if key not in _STRUCTURING_ELEMENT:
+        _STRUCTURING_ELEMENT[key] = cv.getStructuringElement(shape_, (size_,)*2)
+    return _STRUCTURING_ELEMENT[key]
+
+_GRID_PAD = 2
+# cv.remap的輸入寬度需小於SHRT_MAX
+_SHRT_MAX = 32767
+_GRID_KERNEL = np.array([1, 4, 6, 4, 1], np.float32) / 16
+
+# 每組約為3個整張影像大小的陣列, 只保留最近用到的幾組, 拉條調整sigma時不會無限增加
+@lru_cache(maxsize=4)
+def _grid_map(shape_: 'tuple[int, int]', sigma_space_: float,
+              grid_w_: int) -> 'tuple[np.ndarray, np.ndarray, np.ndarray]':
+    '''
+        用途:
+        返回快取的像素到網格座標的對應表: 浮點x, 浮點y(已含邊界),
+        以及最近網格點的平面索引值.
+    '''
+    height, width = shape_
+    x = np.arange(width, dtype=np.float32) / sigma_space_ + _GRID_PAD
+    y = np.arange(height, dtype=np.float32) / sigma_space_ + _GRID_PAD
+    plane = np.rint(y).astype(np.intp)[:, None] * grid_w_ + np.rint(x).astype(np.intp)
+    return (np.ascontiguousarray(np.broadcast_to(x, shape_)),
+            np.ascontiguousarray(np.broadcast_to(y[:, None], shape_)),
+            plane.ravel())
+
+def _grid_size(shape_: 'tuple[int, int]', sigma_color_: float,
+               sigma_space_: float) -> 'tuple[int, int, int]':
+    '''
+        用途:
+        返回網格的(深度, 高, 寬), 已含邊界.
+    '''
+    height, width = shape_
+    return (int(255 / sigma_color_) + 1 + 2 * _GRID_PAD,
+            int((height - 1) / sigma_space_) + 1 + 2 * _GRID_PAD,
+            int((width - 1) / sigma_space_) + 1 + 2 * _GRID_PAD)
 
-    return img
\ No newline at end of file
+def _grid_blur(grid_: np.ndarray) -> np.ndarray:
+    '''
+        用途:
+        網格三個軸各以[1, 4, 6, 4, 1] / 16做卷積, 邊界補0.
+    '''
+    for z in range(len(grid_)):
+        cv.sepFilter2D(grid_[z], -1, _GRID_KERNEL, _GRID_KERNEL, dst=grid_[z],
+                       borderType=cv.BORDER_CONSTANT)
+    depth = len(grid_)
+    padded = np.pad(grid_, ((2, 2),) + ((0, 0),) * (grid_.ndim - 1))
+    return (padded[:depth] + padded[4:] + 4 * (padded[1:depth+1] + padded[3:depth+3])
+            + 6 * padded[2:depth+2]) / 16
+
+def _bilateral_grid(src_: np.ndarray, sigma_color_: float, sigma_space_: float) -> np.ndarray:
+    '''
+        用途:
+        以雙邊網格近似單通道影像的雙邊濾波(Paris & Durand).
+
+        運作方式:
+        1. 依(數值 / sigma_color, y / sigma_space, x / sigma_space)把像素
+           值與權重累加到三維網格.
+        2. 網格三個軸各做一次小型高斯模糊.
+        3. 網格的z切片橫向排成一張2D圖, 每個像素以cv.remap對相鄰兩個
+           z切片做雙線性內插, 再沿z線性內插, 最後除以權重.
+    '''
+    height, width = src_.shape[:2]
+    grid_d, grid_h, grid_w = _grid_size((height, width), sigma_color_, sigma_space_)
+
+    map_x, map_y, plane = _grid_map((height, width), float(sigma_space_), grid_w)
+    level = np.arange(256, dtype=np.float32) / sigma_color_ + _GRID_PAD
+    z = level[src_]
+    index = np.rint(level).astype(np.intp)[src_].ravel() * (grid_h * grid_w) + plane
+
+    size = grid_d * grid_h * grid_w
+    grid = np.empty((size, 2), np.float32)
+    grid[:, 0] = np.bincount(index, src_.ravel(), size)
+    grid[:, 1] = np.bincount(index, None, size)
+    grid = _grid_blur(grid.reshape(grid_d, grid_h, grid_w, 2))
+
+    # z切片橫向排列成(grid_h, grid_d * grid_w, 2)
+    atlas = np.ascontiguousarray(grid.transpose(1, 0, 2, 3).reshape(grid_h, -1, 2))
+    z0 = np.floor(z)
+    x0 = map_x + z0 * grid_w
+    lower = cv.remap(atlas, x0, map_y, cv.INTER_LINEAR)
+    upper = cv.remap(atlas, x0 + grid_w, map_y, cv.INTER_LINEAR)
+    cv.subtract(upper, lower, dst=upper)
+    cv.multiply(upper, cv.merge([z - z0] * 2), dst=upper)
+    cv.add(lower, upper, dst=lower)
+
+    value, weight = cv.split(lower)
+    return cv.convertScaleAbs(cv.divide(value, cv.max(weight, 1e-6)))
+
+def _integral_box(src_: np.ndarray, k_size_: int, dst_: np.ndarray=None) -> np.ndarray:
+    '''
+        用途:
+        以積分影像計算平均濾波, 成本與內核大小無關, 邊界同cv.blur
+        (BORDER_REFLECT_101).
+    '''
+    before = k_size_ // 2
+    after = k_size_ - 1 - before
+    padded = cv.copyMakeBorder(src_, before, after, before, after, cv.BORDER_REFLECT_101)
+    integer = np.issubdtype(src_.dtype, np.integer) and src_.itemsize <= 2
+    table = cv.integral(padded, sdepth=cv.CV_32S if integer else cv.CV_64F)
+    if table.ndim == 2 and src_.ndim == 3:
+        table = table[..., None]
+    k = k_size_
+    box = table[k:, k:] - table[:-k, k:] - table[k:, :-k] + table[:-k, :-k]
+    result = box.reshape(src_.shape) * (1 / (k * k))
+    if np.issubdtype(src_.dtype, np.integer):
+        result = np.rint(result)
+    if dst_ is None:
+        return result.astype(src_.dtype)
+    np.copyto(dst_, result, casting="unsafe")
+    return dst_
+
+_GAUSSIAN_KERNEL: 'dict[tuple[int, np.dtype], np.ndarray]' = {}
+
+def _separable_gaussian(src_: np.ndarray, k_size_: int, dst_: np.ndarray=None) -> np.ndarray:
+    '''
+        用途:
+        以快取的一維高斯內核做cv.sepFilter2D, sigma同cv.GaussianBlur(sigma為0).
+    '''
+    key = k_size_, _kernel_dtype(src_)
+    if key not in _GAUSSIAN_KERNEL:
+        _GAUSSIAN_KERNEL[key] = cv.getGaussianKernel(k_size_, 0, cv.CV_64F).astype(key[1])
+    kernel = _GAUSSIAN_KERNEL[key]
+    return cv.sepFilter2D(src_, -1, kernel, kernel, dst=dst_)
+
+def _box_gaussian(src_: np.ndarray, k_size_: int, dst_: np.ndarray=None) -> np.ndarray:
+    '''
+        用途:
+        以三次平均濾波近似高斯濾波, 寬度依cv.GaussianBlur在sigma為0時
+        由內核大小推得的sigma計算. 誤差通常大於1階, 需放寬容許誤差才會被選用.
+    '''
+    sigma = 0.3 * ((k_size_ - 1) * 0.5 - 1) + 0.8
+    ideal = np.sqrt(12 * sigma ** 2 / 3 + 1)
+    lower = int(ideal) - (1 - int(ideal) % 2)
+    count = int(round((12 * sigma ** 2 - 3 * lower ** 2 - 12 * lower - 9) / (-4 * lower - 4)))
+    result = src_
+    for i in range(3):
+        size = max(lower if i < count else lower + 2, 1)
+        result = cv.blur(result, (size, size), dst=dst_ if i == 2 else None)
+    return result
+
+def _per_channel_median(src_: np.ndarray, k_size_: int, dst_: np.ndarray=None) -> np.ndarray:
+    '''
+        用途:
+        各通道分別做cv.medianBlur後合併.
+    '''
+    if src_.ndim == 2:
+        return cv.medianBlur(src_, k_size_, dst=dst_)
+    return cv.merge([cv.medianBlur(layer, k_size_) for layer in cv.split(src_)], dst=dst_)
+
+def _box_candidate() -> 'dict[str, Callable]':
+    return {"sep_filter": lambda src, k, dst: cv.sepFilter2D(
+                src, -1, _box_kernel(k, _kernel_dtype(src)), _box_kernel(k, _kernel_dtype(src)),
+                dst=dst),
+            "blur": lambda src, k, dst: cv.blur(src, (k, k), dst=dst),
+            "box_filter": lambda src, k, dst: cv.boxFilter(src, -1, (k, k), dst=dst),
+            "integral": _integral_box}
+
+# 函式名稱 -> {實作名稱: 實作}, 第一個為原本的實作, 作為誤差比較的基準
+_CANDIDATE: 'dict[str, dict[str, Callable]]' = {
+    "blur": {"blur": lambda src, k, dst: cv.blur(src, (k, k), dst=dst),
+             **{name: fn for name, fn in _box_candidate().items() if name != "blur"}},
+    "convolution": _box_candidate(),
+    "gaussian": {"gaussian": lambda src, k, dst: cv.GaussianBlur(src, (k, k), 0, dst=dst),
+                 "sep_filter": _separable_gaussian,
+                 "box_approximation": _box_gaussian},
+    "median": {"median": lambda src, k, dst: cv.medianBlur(src, k, dst=dst),
+               "per_channel": _per_channel_median}}
+
+class _Tuner:
+    """
+        功能:
+        依(函式, 內核大小, 影像大小, 型態)記錄最快的實作.
+        第一次遇到某個組合時以原本的實作為基準, 執行所有候選實作,
+        誤差在容許範圍內者計時, 選出最快者, 之後直接使用.
+    """
+    def __init__(self):
+        self.__enabled: 'bool' = False
+        self.__winner: 'dict[str, str]' = {}
+        self.__path: 'str' = None
+        self.__tolerance: 'float' = 1.0
+        self.__repeat: 'int' = 3
+        self.__lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.__enabled
+
+    @property
+    def winner(self) -> 'Mapping[str, str]':
+        return MappingProxyType(self.__winner)
+
+    def configure(self, enable_: bool, cache_path_: 'str | None', tolerance_: float,
+                  repeat_: int):
+        with self.__lock:
+            self.__enabled = enable_
+            self.__tolerance = tolerance_
+            self.__repeat = max(repeat_, 1)
+            self.__path = cache_path_
+            if cache_path_ is not None and os.path.exists(cache_path_):
+                with open(cache_path_) as file:
+                    self.__winner.update(json.load(file))
+
+    def clear(self):
+        with self.__lock:
+            self.__winner.clear()
+
+    @staticmethod
+    def __key(name_: 'str', src_: np.ndarray, k_size_: int) -> 'str':
+        return f"{name_}|{k_size_}|{'x'.join(map(str, src_.shape))}|{src_.dtype.name}"
+
+    def run(self, name_: 'str', src_: np.ndarray, k_size_: int,
+            dst_: np.ndarray=None) -> np.ndarray:
+        '''
+            用途:
+            以已選出的實作執行, 尚未選出則先調校.
+        '''
+        key = self.__key(name_, src_, k_size_)
+        winner = self.__winner.get(key)
+        candidate = _CANDIDATE[name_]
+        if winner is None or winner not in candidate:
+            winner = self.__tune(key, candidate, src_, k_size_)
+        return candidate[winner](src_, k_size_, dst_)
+
+    def __tune(self, key_: 'str', candidate_: 'dict[str, Callable]', src_: np.ndarray,
+               k_size_: int) -> 'str':
+        '''
+            用途:
+            計時所有誤差在容許範圍內的候選實作, 記錄並返回最快者.
+
+            注意事項:
+            第一個候選實作為原本的實作, 即基準. 基準發生錯誤時直接拋出,
+            與未開啟調校時相同, 且不記錄任何結果.
+        '''
+        reference = None
+        best, best_cost = None, float("inf")
+        for order, (name, fn) in enumerate(candidate_.items()):
+            if not order:
+                reference = fn(src_, k_size_, None)
+            else:
+                try:
+                    result = fn(src_, k_size_, None)
+                except cv.error:
+                    continue
+                if result.shape != reference.shape or cv.norm(
+                        result, reference, cv.NORM_INF) > self.__tolerance:
+                    continue
+
+            cost = float("inf")
+            for _ in range(self.__repeat):
+                start = time.perf_counter()
+                fn(src_, k_size_, None)
+                cost = min(cost, time.perf_counter() - start)
+            if cost < best_cost:
+                best, best_cost = name, cost
+
+        with self.__lock:
+            self.__winner[key_] = best
+            if self.__path is not None:
+                directory = os.path.dirname(self.__path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.__path, "w") as file:
+                    json.dump(self.__winner, file, indent=4, sort_keys=True)
+        return best
+
+_TUNER = _Tuner()
+
+def autotune(enable_: bool=True, cache_path_: str=None, tolerance_: float=1.0,
+             repeat_: int=3):
+    '''
+        用途:
+        開啟或關閉blur, convolution(平均內核), gaussian(sigma為0)與median
+        的自動選擇實作.
+
+        參數 enable_: 是否開啟.
+        參數 cache_path_: 結果的JSON檔路徑, 存在時先載入, 有新結果時寫回,
+                          可不設定(只存在記憶體中).
+        參數 tolerance_: 與原本實作相比的最大容許誤差(各像素差的最大值).
+        參數 repeat_: 每個候選實作計時的次數, 取最小值.
+
+        注意事項:
+        1. 每個(函式, 內核大小, 影像大小, 型態)第一次呼叫時會執行所有
+           候選實作, 該次呼叫會明顯較慢.
+        2. 最快的實作與硬體有關, 快取檔請勿在不同機器間共用.
+
+        範例用法:
+        autotune(True, os.path.expanduser("~/.cache/cv_py/autotune.json"))
+    '''
+    _TUNER.configure(enable_, cache_path_, tolerance_, repeat_)
+
+def autotune_cache() -> 'Mapping[str, str]':
+    '''
+        用途:
+        返回目前的選擇結果(唯讀), 鍵值為"函式|內核大小|影像大小|型態".
+    '''
+    return _TUNER.winner
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+import cv2 as cv
+import numpy as np
+import multiprocessing as mp
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, Iterator, Sequence
+from .image import Tile, tile
+
+"""
+    尚未定型
+
+    功能:
+    1. 離線影片多行程處理. 解碼後的影像放入共享記憶體槽位, 子行程直接
+       讀取, 不需pickle整張影像.
+    2. 單張影像分塊多執行緒處理. openCV函式執行時會釋放GIL, 各塊可
+       同時在不同核心上運算.
+"""
+
+_WORKER: 'dict[str, Any]' = {}
+
+# 執行緒數量 -> 執行緒池, 重複使用避免每幀建立執行緒
+_EXECUTOR: 'dict[int, ThreadPoolExecutor]' = {}
+_EXECUTOR_LOCK = threading.Lock()
+
+def _worker_init(shm_name_: str, shape_: 'tuple[int, ...]', dtype_: str,
+                 slot_count_: int, fn_: 'Callable[[np.ndarray], Any]'):
+    '''
+        用途:
+        子行程初始化, 連接共享記憶體並建立各槽位的影像視圖.
+    '''
+    shm = shared_memory.SharedMemory(name=shm_name_)
+    frames = np.ndarray((slot_count_,) + tuple(shape_), dtype_, buffer=shm.buf)
+    _WORKER.update(shm=shm, frames=frames, fn=fn_)
+
+def _worker_run(slot_: int) -> Any:
+    '''
+        用途:
+        子行程對指定槽位的影像執行處理函式.
+    '''
+    return _WORKER["fn"](_WORKER["frames"][slot_])
+
+def imap_video(path_: 'str | int', fn_: 'Callable[[np.ndarray], Any]', workers: int=None,
+               slots: int=None) -> 'Iterator[Any]':
+    '''
+        用途:
+        以多行程處理影片的每一幀, 依幀順序逐一產生處理結果.
+
+        參數 path_: 影片路徑或cv.VideoCapture可接受的來源.
+        參數 fn_: 處理函式, 輸入影像, 返回可pickle的結果, 需定義於模組頂層.
+        參數 workers: 子行程數量, 預設為CPU核心數.
+        參數 slots: 共享記憶體槽位數量, 預設為workers的2倍, 決定記憶體上限.
+
+        注意事項:
+        1. fn_收到的影像為共享記憶體視圖, 函式返回後即被覆寫, 若要保留
+           請自行複製.
+        2. 所有幀的尺寸與型態需相同.
+
+        運作方式:
+        1. 主行程解碼影像並直接寫入空閒槽位.
+        2. 子行程只收到槽位編號, 結果依送出順序取回, 取回後槽位才釋放.
+    '''
+    workers = workers or mp.cpu_count()
+    slots = slots or 2 * workers
+    if slots < workers:
+        raise ValueError("Number of slots must not be less than workers")
+
+    cap = cv.VideoCapture(path_)
+    if not cap.isOpened():
+        raise IOError(f"Open video {path_} failed")
+
+    ret, first = cap.read()
+    if not ret:
+        cap.release()
+        return
+
+    shm = shared_memory.SharedMemory(create=True, size=first.nbytes * slots)
+    frames = np.ndarray((slots,) + first.shape, first.dtype, buffer=shm.buf)
+    frames[0] = first
+    view = frame = None
+    pool = mp.Pool(workers, _worker_init,
+                   (shm.name, first.shape, first.dtype.str, slots, fn_))
+    try:
+        free = deque(range(1, slots))
+        pending = deque([(0, pool.apply_async(_worker_run, (0,)))])
+        while True:
+            if not free:
+                slot, result = pending.popleft()
+                yield result.get()
+                free.append(slot)
+
+            slot = free.popleft()
+            view = frames[slot]
+            ret, frame = cap.read(view)
+            if not ret:
+                break
+            if frame.shape != first.shape or frame.dtype != first.dtype:
+                raise ValueError("Frame size changed in the middle of the video")
+            if frame is not view:
+                view[...] = frame
+            pending.append((slot, pool.apply_async(_worker_run, (slot,))))
+
+        while pending:
+            yield pending.popleft()[1].get()
+
+    finally:
+        pool.terminate()
+        pool.join()
+        cap.release()
+        del frames, view, frame
+        shm.close()
+        shm.unlink()
+
+def process_video(path_: 'str | int', fn_: 'Callable[[np.ndarray], Any]', workers: int=None,
+                  slots: int=None) -> 'list[Any]':
+    '''
+        用途:
+        同imap_video, 但一次返回所有結果的列表.
+    '''
+    return list(imap_video(path_, fn_, workers, slots))
+
+def _executor(workers_: int) -> ThreadPoolExecutor:
+    executor = _EXECUTOR.get(workers_)
+    if executor is None:
+        with _EXECUTOR_LOCK:
+            executor = _EXECUTOR.get(workers_)
+            if executor is None:
+                executor = _EXECUTOR[workers_] = ThreadPoolExecutor(workers_, "cv_py_tile")
+    return executor
+
+def _own_contours(contours_: 'Sequence[np.ndarray]', tile_: Tile) -> 'list[np.ndarray]':
+    '''
+        用途:
+        將一塊的輪廓轉成整張影像座標, 只保留外接矩形中心落在該塊core內
+        的輪廓, 重疊區域內的同一個物體只會被保留一次.
+    '''
+    ox, oy = tile_.offset
+    x, y, w, h = tile_.core
+    owned = []
+    for contour in contours_:
+        bx, by, bw, bh = cv.boundingRect(contour)
+        cx, cy = ox + bx + bw // 2, oy + by + bh // 2
+        if x <= cx < x + w and y <= cy < y + h:
+            owned.append(contour + np.array((ox, oy), contour.dtype))
+    return owned
+
+def process_tiles(img_: np.ndarray, fn_: 'Callable[[np.ndarray], Any]', rows_: int=2,
+                  cols_: int=2, overlap_: int=0, workers: int=None,
+                  dst: np.ndarray=None) -> 'np.ndarray | tuple[np.ndarray]':
+    '''
+        用途:
+        將影像分塊後以執行緒池對每塊執行fn_, 再把結果接回整張影像.
+
+        參數 img_: 輸入影像.
+        參數 fn_: 處理函式, 輸入一塊影像視圖, 返回與輸入同大小的影像(例如
+                  濾波或二值化結果), 或該塊座標的輪廓序列.
+        參數 rows_: 垂直方向的塊數.
+        參數 cols_: 水平方向的塊數.
+        參數 overlap_: 各塊重疊的像素, 見tile().
+        參數 workers: 執行緒數量, 預設為塊數與CPU核心數較小者.
+        參數 dst: 預先配置的輸出影像, fn_返回影像時使用, 可不設定.
+
+        注意事項:
+        1. 濾波時overlap_需至少為內核半徑, 結果才會與整張處理相同.
+        2. 返回輪廓時以外接矩形中心決定所屬的塊, 大於overlap_的物體
+           可能被切成多段, 此時請讓fn_返回二值影像, 接回後再找輪廓.
+
+        範例用法:
+        blurred = process_tiles(frame, lambda view: cv.medianBlur(view, 5), 2, 2, 2)\n
+        contours = process_tiles(binary, lambda view: cv.findContours(view, cv.RETR_EXTERNAL,
+                                 cv.CHAIN_APPROX_SIMPLE)[0], 2, 2, 32)
+
+        運作方式:
+        1. 影像結果: 每塊只把core範圍複製到輸出, 重疊區域直接丟棄,
+           複製也在各執行緒中進行.
+        2. 輪廓結果: 每塊加上偏移量後, 只保留中心在core內的輪廓.
+    '''
+    tiles = tile(img_, rows_, cols_, overlap_)
+    workers = workers or min(len(tiles), os.cpu_count() or 1)
+    lock = threading.Lock()
+    output = [dst]
+
+    def run(tile_: Tile):
+        result = fn_(tile_.image)
+        if not isinstance(result, np.ndarray):
+            return _own_contours(result, tile_)
+
+        if result.shape[:2] != tile_.image.shape[:2]:
+            raise ValueError("Result size must match the tile size")
+        with lock:
+            if output[0] is None:
+                output[0] = np.empty(img_.shape[:2] + result.shape[2:], result.dtype)
+        ox, oy = tile_.offset
+        x, y, w, h = tile_.core
+        output[0][y:y+h, x:x+w] = result[y-oy:y-oy+h, x-ox:x-ox+w]
+        return None
+
+    if workers == 1:
+        result = [run(item) for item in tiles]
+    else:
+        result = list(_executor(workers).map(run, tiles))
+
+    contour = [item for item in result if item is not None]
+    if not contour:
+        return output[0]
+    if len(contour) != len(result):
+        raise TypeError("Function must return either images or contours for every tile")
+    return tuple(c for item in contour for c in item)
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+import cv2 as cv
+import numpy as np
+from typing import Callable, NamedTuple, Sequence
+from .gate import FrameGate
+from .image import largest_contour
+from .noiseProcess import gaussian, median, morph
+from .recognize import simple_line_check_batch
+from . import profiling
+from .profiling import profiled
+
+"""
+    尚未定型
+
+    功能:
+    將常用的逐幀處理串成固定流程, 中間影像只在第一幀配置, 之後
+    透過openCV的dst參數重複使用.
+"""
+
+class PipelineResult(NamedTuple):
+    '''
+        用途:
+        Pipeline.run()的返回值.
+
+        image: 最後一個影像階段的輸出, 為內部緩衝區, 下一幀會被覆寫.
+        contours: 輪廓, 未設定contours階段則為None.
+        index: largest階段的索引值, 未設定或無符合輪廓則為None.
+        line: 各索引值對應的直線檢測結果, 未設定line_check階段則為None.
+    '''
+    image: np.ndarray
+    contours: 'tuple[np.ndarray]' = None
+    index: 'tuple[int]' = None
+    line: 'tuple[bool]' = None
+
+class Pipeline:
+    """
+        功能:
+        1. 一次宣告所有處理階段, 每幀只需呼叫run().
+        2. 第一幀依輸入尺寸配置所有中間影像, 之後的幀重複使用, 輸入尺寸
+           或型態改變時才重新配置.
+        3. 參數可為數值或無參數函式, 後者每幀呼叫一次, 方便搭配Trackbar.
+        4. 設定gate()後, 畫面沒有變化且參數相同時直接返回上一幀的結果.
+
+        範例用法:
+        pipeline = Pipeline()\n
+        pipeline.hsv_threshold(lambda: HSV.values("min"), lambda: HSV.values("max"))\n
+        pipeline.morph(cv.MORPH_OPEN, 5).contours().largest(1000, 1)\n
+        result = pipeline.run(frame)
+
+        注意事項:
+        影像階段(gaussian, median, morph, hsv_threshold)需在contours之前,
+        largest和line_check需在contours之後.
+    """
+    IMAGE_STAGE = "gaussian", "median", "morph", "hsv_threshold"
+
+    def __init__(self):
+        '''
+            用途:
+            建立空的處理流程.
+        '''
+        self.__stage: 'list[tuple[str, tuple]]' = []
+        self.__buffer: 'list[tuple[np.ndarray, ...]]' = []
+        self.__input: 'tuple[tuple[int, ...], np.dtype]' = None
+        self.__gate: 'FrameGate' = None
+
+    def __add(self, name_: 'str', *param_):
+        '''
+            用途:
+            檢查階段順序並加入流程.
+
+            參數 name_: 階段名稱.
+            參數 param_: 階段參數.
+        '''
+        names = [name for name, _ in self.__stage]
+        if name_ in self.IMAGE_STAGE and "contours" in names:
+            raise ValueError(f"Image stage {name_} must be added before contours")
+        if name_ == "contours" and "contours" in names:
+            raise ValueError("Can't add contours stage again")
+        if name_ in ("largest", "line_check") and "contours" not in names:
+            raise ValueError(f"Stage {name_} needs contours stage first")
+
+        self.__stage.append((name_, param_))
+        self.__input = None
+        return self
+
+    def gaussian(self, k_size: 'int | Callable', sigmaX: float=0, sigmaY: float=0) -> 'Pipeline':
+        return self.__add("gaussian", k_size, sigmaX, sigmaY)
+
+    def median(self, k_size: 'int | Callable') -> 'Pipeline':
+        return self.__add("median", k_size)
+
+    def morph(self, method_: 'int | Sequence', kernel_size_: 'int | Sequence | Callable',
+              kernel_shape_: 'int | Sequence' = cv.MORPH_RECT,
+              iterations: int=1) -> 'Pipeline':
+        return self.__add("morph", method_, kernel_size_, kernel_shape_, iterations)
+
+    def hsv_threshold(self, lower_: 'Sequence[int] | Callable',
+                      upper_: 'Sequence[int] | Callable') -> 'Pipeline':
+        '''
+            用途:
+            將BGR影像轉為HSV後二值化.
+
+            參數 lower_: HSV下限, 例如lambda: HSV.values("min").
+            參數 upper_: HSV上限, 例如lambda: HSV.values("max").
+        '''
+        return self.__add("hsv_threshold", lower_, upper_)
+
+    def contours(self, mode_: int=cv.RETR_EXTERNAL,
+                 method_: int=cv.CHAIN_APPROX_SIMPLE) -> 'Pipeline':
+        return self.__add("contours", mode_, method_)
+
+    def largest(self, area_threshold_: 'int | float | Callable'=0,
+                number_found_: 'int | Callable'=1) -> 'Pipeline':
+        return self.__add("largest", area_threshold_, number_found_)
+
+    def line_check(self, threshold_: 'int | float | Callable') -> 'Pipeline':
+        '''
+            用途:
+            對largest選出的輪廓(未設定則為全部輪廓)做直線檢測.
+
+            參數 threshold_: 最小角度差.
+        '''
+        return self.__add("line_check", threshold_)
+
+    def gate(self, block_: int=16, threshold_: 'int | float' = 4) -> 'Pipeline':
+        '''
+            用途:
+            在所有階段前加上FrameGate, 參數見FrameGate.
+
+            注意事項:
+            所有階段的參數值會一起作為FrameGate的key_, Trackbar數值改變時
+            一定會重新處理.
+        '''
+        self.__gate = FrameGate(block_, threshold_)
+        return self
+
+    def __allocate(self, frame_: np.ndarray):
+        '''
+            用途:
+            依輸入影像推算各影像階段的輸出尺寸, 並配置緩衝區.
+
+            參數 frame_: 輸入影像.
+        '''
+        shape, dtype = frame_.shape, frame_.dtype
+        self.__buffer = []
+        for name, _ in self.__stage:
+            if name in ("gaussian", "median"):
+                self.__buffer.append((np.empty(shape, dtype),))
+            elif name == "morph":
+                self.__buffer.append((np.empty(shape, dtype), np.empty(shape, dtype)))
+            elif name == "hsv_threshold":
+                self.__buffer.append((np.empty(shape, dtype), np.empty(shape[:2], np.uint8)))
+                shape, dtype = shape[:2], np.dtype(np.uint8)
+            else:
+                self.__buffer.append(())
+        self.__input = frame_.shape, frame_.dtype
+
+    @profiled
+    def run(self, frame_: np.ndarray) -> PipelineResult:
+        '''
+            用途:
+            對一幀影像執行所有階段.
+
+            參數 frame_: 輸入影像.
+        '''
+        param = [tuple(value() if callable(value) else value for value in param)
+                 for _, param in self.__stage]
+        if self.__gate is not None:
+            key = [tuple(value.tolist() if isinstance(value, np.ndarray) else value
+                         for value in stage) for stage in param]
+            return self.__gate.process(frame_, lambda frame: self.__run(frame, param), key)
+        return self.__run(frame_, param)
+
+    def __run(self, frame_: np.ndarray, param_: 'list[tuple]') -> PipelineResult:
+        '''
+            用途:
+            以已取值的參數執行所有階段.
+
+            參數 frame_: 輸入影像.
+            參數 param_: 各階段的參數值.
+        '''
+        if self.__input != (frame_.shape, frame_.dtype):
+            self.__allocate(frame_)
+
+        img = frame_
+        contours = index = line = None
+        selected = None
+        for (name, _), param, buffer in zip(self.__stage, param_, self.__buffer):
+            if name == "gaussian":
+                img = gaussian(img, *param, dst=buffer[0])
+            elif name == "median":
+                img = median(img, *param, dst=buffer[0])
+            elif name == "morph":
+                img = morph(img, *param, dst=buffer)
+            elif name == "hsv_threshold":
+                with profiling.stage("Pipeline.hsv_threshold", img.size):
+                    hsv = cv.cvtColor(img, cv.COLOR_BGR2HSV, dst=buffer[0])
+                    img = cv.inRange(hsv, np.asarray(param[0]), np.asarray(param[1]),
+                                     dst=buffer[1])
+            elif name == "contours":
+                with profiling.stage("findContours", img.size):
+                    contours, _ = cv.findContours(img, *param)
+            elif name == "largest":
+                index = largest_contour(contours, *param)
+                selected = () if index is None else index
+            elif name == "line_check":
+                if selected is None:
+                    selected = range(len(contours))
+                line = tuple(simple_line_check_batch([contours[i] for i in selected],
+                                                     *param).tolist())
+
+        return PipelineResult(img, contours, index, line)
+
+class StageGraph:
+    """
+        功能:
+        1. 以名稱宣告處理階段及其輸入, 形成有向無環圖, 輸入可為"frame"
+           (原始影像)或先前加入的階段.
+        2. 每個階段可綁定Trackbar拉條或群組, 其數值作為額外參數傳入.
+        3. 每個階段快取輸出, 只有在輸入影像、上游階段輸出或綁定參數的
+           版本號改變時才重新計算, 調整最後一個階段的參數不會重跑前面的
+           cvtColor和inRange.
+
+        範例用法:
+        graph = StageGraph()\n
+        graph.add("hsv", lambda frame: cv.cvtColor(frame, cv.COLOR_BGR2HSV), "frame")\n
+        graph.add("binary", lambda hsv, low, high: cv.inRange(hsv, low, high), "hsv",
+                  param_=((HSV, "min"), (HSV, "max")))\n
+        graph.add("morph", lambda binary, k: morph(binary, cv.MORPH_OPEN, k), "binary",
+                  param_=((K_SIZE, "k_size"),))\n
+        output = graph.run(frame)\n
+        output["morph"]
+
+        注意事項:
+        1. 參數是否改變只看Trackbar.version(), 不比較數值.
+        2. 未指定frame_id_時以物件是否相同判斷是否為同一幀, 暫停或調整
+           靜態影像時重複傳入同一個陣列即可命中快取. 原地覆寫影像內容
+           (例如cap.read(frame))時需自行傳入frame_id_.
+        3. 階段函式應返回新的物件, 若寫入共用的dst, 快取的輸出會被覆寫.
+    """
+    def __init__(self):
+        '''
+            用途:
+            建立空的階段圖.
+        '''
+        # 名稱 -> (函式, 輸入名稱, 綁定參數)
+        self.__node: 'dict[str, tuple[Callable, tuple[str], tuple]]' = {}
+        # 名稱 -> (輸入戳記與參數版本, 輸出戳記, 輸出)
+        self.__cache: 'dict[str, tuple[tuple, int, object]]' = {}
+        self.__frame: 'np.ndarray' = None
+        self.__frame_id: 'object' = None
+        self.__stamp: 'int' = 0
+        self.__count: 'dict[str, list[int]]' = {}
+
+    def add(self, name_: 'str', fn_: 'Callable', *input_: 'str',
+            param_: 'Sequence[tuple]' = ()) -> 'StageGraph':
+        '''
+            用途:
+            加入一個階段.
+
+            參數 name_: 階段名稱, 不可為"frame"或重複.
+            參數 fn_: 階段函式, 呼叫方式為fn_(*輸入, *參數).
+            參數 input_: 輸入名稱, 為"frame"或已加入的階段.
+            參數 param_: 綁定的參數, 每個元素為(Trackbar, 拉條名稱或群組名稱).
+        '''
+        if name_ == "frame" or name_ in self.__node:
+            raise ValueError(f"Can't add stage {name_}")
+        for name in input_:
+            if name != "frame" and name not in self.__node:
+                raise ValueError(f"Input {name} must be added before {name_}")
+
+        self.__node[name_] = (fn_, input_, tuple(param_))
+        self.__count[name_] = [0, 0]
+        return self
+
+    def run(self, frame_: np.ndarray, frame_id_: 'object' = None) -> 'dict[str, object]':
+        '''
+            用途:
+            依加入順序執行所有階段, 返回{階段名稱: 輸出}.
+
+            參數 frame_: 輸入影像.
+            參數 frame_id_: 影像編號, 相同時視為同一幀, 可不設定.
+
+            運作方式:
+            1. 每個輸出有一個戳記, 重新計算時換成新的戳記.
+            2. 階段的快取鍵為(各輸入的戳記, 綁定參數的版本號), 與上次相同時
+               沿用輸出, 否則呼叫函式並更新戳記, 下游階段因此跟著重算.
+        '''
+        if frame_id_ is None:
+            same = frame_ is self.__frame and self.__frame_id is None
+        else:
+            same = frame_id_ == self.__frame_id
+        if not same or "frame" not in self.__cache:
+            self.__stamp += 1
+            self.__cache["frame"] = ((), self.__stamp, frame_)
+        self.__frame, self.__frame_id = frame_, frame_id_
+
+        output = {}
+        for name, (fn, input_name, param) in self.__node.items():
+            key = (tuple(self.__cache[source][1] for source in input_name),
+                   tuple(trackbar.version(bar) for trackbar, bar in param))
+            cache = self.__cache.get(name)
+            if cache is not None and cache[0] == key:
+                self.__count[name][0] += 1
+                output[name] = cache[2]
+                continue
+
+            argument = [self.__cache[source][2] for source in input_name]
+            argument += [trackbar.values(bar) for trackbar, bar in param]
+            with profiling.stage(f"StageGraph.{name}"):
+                result = fn(*argument)
+            self.__stamp += 1
+            self.__cache[name] = (key, self.__stamp, result)
+            self.__count[name][1] += 1
+            output[name] = result
+        return output
+
+    def invalidate(self, name_: 'str' = None):
+        '''
+            用途:
+            清除快取, 下次run()時重新計算.
+
+            參數 name_: 只清除此階段(及其下游), 未指定則清除全部.
+        '''
+        if name_ is None:
+            self.__cache.clear()
+        else:
+            self.__cache.pop(name_, None)
+
+    def stats(self) -> 'dict[str, dict[str, int]]':
+        '''
+            用途:
+            返回各階段沿用快取(hit)與重新計算(miss)的次數.
+        '''
+        return {name: {"hit": hit, "miss": miss} for name, (hit, miss) in self.__count.items()}
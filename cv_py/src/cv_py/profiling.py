@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+import json
+import os
+import threading
+import time
+import tracemalloc
+import numpy as np
+from collections import deque
+from contextlib import nullcontext
+from functools import wraps
+from typing import Callable
+
+"""
+    尚未定型
+
+    功能:
+    選用的效能量測. 記錄每次呼叫cv_py函式(或自訂區段)的時間、輸入大小
+    與配置的記憶體, 提供各階段的p50/p95/p99, 並可輸出Chrome trace JSON
+    (chrome://tracing或Perfetto開啟).
+
+    範例用法:
+    profiling.enable()\n
+    ...\n
+    print(profiling.stats())\n
+    profiling.dump_trace("trace.json")
+
+    注意事項:
+    1. 預設關閉, 關閉時被量測的函式只多一次旗標判斷與一層函式呼叫.
+    2. 記憶體量測使用tracemalloc, 開啟後會明顯變慢, 只在需要時使用.
+       多執行緒同時量測時記憶體數值只能當作參考.
+"""
+
+_ENABLED: 'bool' = False
+_MEMORY: 'bool' = False
+_OWN_TRACEMALLOC: 'bool' = False
+_LOCK = threading.Lock()
+_LOCAL = threading.local()
+
+# 所有紀錄(名稱, 開始ns, 經過ns, 輸入大小, 配置位元組, 執行緒ID), 供輸出trace
+_RECORD: 'deque[tuple]' = deque(maxlen=65536)
+
+# 名稱 -> 最近window筆的經過時間(ns)與配置位元組, 供計算百分位數
+_WINDOW: 'dict[str, deque]' = {}
+_ALLOC: 'dict[str, deque]' = {}
+_WINDOW_SIZE: 'int' = 1024
+
+def enable(capacity_: int=65536, window_: int=1024, memory_: bool=False):
+    '''
+        用途:
+        開始量測, 並清除先前的紀錄.
+
+        參數 capacity_: 保留的紀錄總筆數, 超過時丟棄最舊的.
+        參數 window_: 每個階段計算百分位數使用的最近筆數.
+        參數 memory_: 是否以tracemalloc量測配置的記憶體.
+    '''
+    global _ENABLED, _MEMORY, _OWN_TRACEMALLOC, _RECORD, _WINDOW_SIZE
+    with _LOCK:
+        _RECORD = deque(maxlen=capacity_)
+        _WINDOW.clear()
+        _ALLOC.clear()
+        _WINDOW_SIZE = window_
+        _MEMORY = memory_
+        if memory_ and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _OWN_TRACEMALLOC = True
+        _ENABLED = True
+
+def disable():
+    '''
+        用途:
+        停止量測, 紀錄會保留到下次enable()或reset().
+    '''
+    global _ENABLED, _MEMORY, _OWN_TRACEMALLOC
+    _ENABLED = _MEMORY = False
+    if _OWN_TRACEMALLOC:
+        _OWN_TRACEMALLOC = False
+        tracemalloc.stop()
+
+def is_enabled() -> bool:
+    return _ENABLED
+
+def reset():
+    '''
+        用途:
+        清除所有紀錄, 不改變開關狀態.
+    '''
+    with _LOCK:
+        _RECORD.clear()
+        _WINDOW.clear()
+        _ALLOC.clear()
+
+def _input_size(args_: tuple) -> int:
+    '''
+        用途:
+        取得第一個影像參數的像素數量, 沒有影像時取第一個序列參數的長度.
+    '''
+    for arg in args_:
+        if isinstance(arg, np.ndarray):
+            return arg.size
+    for arg in args_:
+        if not isinstance(arg, str) and hasattr(arg, "__len__"):
+            return len(arg)
+    return 0
+
+def _record(name_: 'str', start_: int, duration_: int, size_: int, alloc_: int):
+    _RECORD.append((name_, start_, duration_, size_, alloc_, threading.get_ident()))
+    window = _WINDOW.get(name_)
+    if window is None:
+        with _LOCK:
+            window = _WINDOW.setdefault(name_, deque(maxlen=_WINDOW_SIZE))
+            _ALLOC.setdefault(name_, deque(maxlen=_WINDOW_SIZE))
+    window.append(duration_)
+    _ALLOC[name_].append(alloc_)
+
+def _memory_enter() -> list:
+    '''
+        用途:
+        記錄進入區段時的記憶體, 並重設峰值. 巢狀區段以堆疊記錄,
+        內層結束時把峰值傳回外層, 外層的峰值不會因重設而遺失.
+    '''
+    stack = getattr(_LOCAL, "stack", None)
+    if stack is None:
+        stack = _LOCAL.stack = []
+    current, peak = tracemalloc.get_traced_memory()
+    if stack:
+        stack[-1][1] = max(stack[-1][1], peak)
+    tracemalloc.reset_peak()
+    frame = [current, current]
+    stack.append(frame)
+    return frame
+
+def _memory_exit() -> int:
+    stack = _LOCAL.stack
+    base, peak = stack.pop()
+    peak = max(peak, tracemalloc.get_traced_memory()[1])
+    if stack:
+        stack[-1][1] = max(stack[-1][1], peak)
+    return peak - base
+
+class _Stage:
+    """
+        功能:
+        量測一個區段的context manager, 只在量測開啟時建立.
+    """
+    __slots__ = ("name", "size", "start", "memory")
+
+    def __init__(self, name_: 'str', size_: int):
+        self.name = name_
+        self.size = size_
+
+    def __enter__(self):
+        self.memory = _MEMORY
+        if self.memory:
+            _memory_enter()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        duration = time.perf_counter_ns() - self.start
+        alloc = _memory_exit() if self.memory else 0
+        _record(self.name, self.start, duration, self.size, alloc)
+        return False
+
+_NULL_STAGE = nullcontext()
+
+def stage(name_: 'str', size_: int=0):
+    '''
+        用途:
+        量測任意程式區段, 例如cv.findContours.
+
+        參數 name_: 階段名稱.
+        參數 size_: 輸入大小, 可不設定.
+
+        範例用法:
+        with profiling.stage("findContours", binary.size):\n
+            contours, _ = cv.findContours(binary, ...)
+    '''
+    if not _ENABLED:
+        return _NULL_STAGE
+    return _Stage(name_, size_)
+
+def profiled(fn_: Callable = None, *, name_: 'str' = None) -> Callable:
+    '''
+        用途:
+        裝飾器, 量測函式每次呼叫的時間、輸入大小與配置的記憶體.
+
+        參數 fn_: 被裝飾的函式.
+        參數 name_: 階段名稱, 預設為函式的__qualname__.
+
+        範例用法:
+        @profiled\n
+        def morph(...): ...\n
+        @profiled(name_="threshold")\n
+        def threshold(...): ...
+    '''
+    if fn_ is None:
+        return lambda fn: profiled(fn, name_=name_)
+    name = name_ or fn_.__qualname__
+
+    @wraps(fn_)
+    def wrapper(*args, **kwargs):
+        if not _ENABLED:
+            return fn_(*args, **kwargs)
+
+        memory = _MEMORY
+        if memory:
+            _memory_enter()
+        start = time.perf_counter_ns()
+        try:
+            return fn_(*args, **kwargs)
+        finally:
+            duration = time.perf_counter_ns() - start
+            _record(name, start, duration, _input_size(args), _memory_exit() if memory else 0)
+    return wrapper
+
+def stats(name_: 'str' = None) -> 'dict[str, dict[str, float]]':
+    '''
+        用途:
+        返回各階段最近window筆的統計值, 時間單位為毫秒.
+        每個階段包含count, mean, p50, p95, p99, max與alloc(平均配置位元組).
+
+        參數 name_: 只返回指定階段, 可不設定.
+    '''
+    with _LOCK:
+        names = [name_] if name_ is not None else list(_WINDOW)
+        window = {name: np.fromiter(_WINDOW[name], np.int64) for name in names if name in _WINDOW}
+        alloc = {name: np.fromiter(_ALLOC[name], np.int64) for name in window}
+
+    result = {}
+    for name, duration in window.items():
+        if not len(duration):
+            continue
+        ms = duration / 1e6
+        p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+        result[name] = {"count": len(ms), "mean": float(ms.mean()), "p50": float(p50),
+                        "p95": float(p95), "p99": float(p99), "max": float(ms.max()),
+                        "alloc": float(alloc[name].mean())}
+    return result
+
+def dump_trace(path_: 'str'):
+    '''
+        用途:
+        將所有紀錄輸出成Chrome trace JSON.
+
+        參數 path_: 輸出檔案路徑.
+    '''
+    with _LOCK:
+        record = list(_RECORD)
+
+    pid = os.getpid()
+    event = [{"name": name, "ph": "X", "ts": start / 1e3, "dur": duration / 1e3,
+              "pid": pid, "tid": tid, "args": {"size": size, "alloc": alloc}}
+             for name, start, duration, size, alloc, tid in record]
+    with open(path_, "w") as file:
+        json.dump({"traceEvents": event, "displayTimeUnit": "ms"}, file)
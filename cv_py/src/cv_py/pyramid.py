@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+import cv2 as cv
+import numpy as np
+from typing import Callable, NamedTuple, Sequence
+from .image import largest_contour
+from .noiseProcess import morph
+from .profiling import profiled
+
+"""
+    尚未定型
+
+    功能:
+    影像金字塔偵測, 在縮小的影像上二值化、型態學處理與找輪廓, 只把
+    選中的輪廓放回原解析度精修.
+"""
+
+class PyramidResult(NamedTuple):
+    '''
+        用途:
+        pyramid_detect()的返回值, 所有座標皆為原解析度.
+
+        coarse: 縮小影像上找到的所有輪廓, 座標已放大回原解析度.
+        index: coarse中被選中的輪廓索引值, 無符合輪廓則為None.
+        refined: 與index對應的原解析度輪廓, 精修失敗的項目為None.
+        coarse_area: 與index對應的coarse輪廓面積(原解析度單位).
+        refined_area: 與index對應的refined輪廓面積, 失敗則為0.
+    '''
+    coarse: 'tuple[np.ndarray]'
+    index: 'tuple[int]'
+    refined: 'tuple[np.ndarray]'
+    coarse_area: 'tuple[float]'
+    refined_area: 'tuple[float]'
+
+def scale_kernel(k_size_: 'int | Sequence[int]', level_: int) -> 'int | tuple[int]':
+    '''
+        用途:
+        將內核大小依金字塔層數縮小, 取最接近的奇數, 最小為1, 可用於
+        cv.GaussianBlur、cv.medianBlur等要求奇數內核的函式.
+
+        參數 k_size_: 原解析度的內核大小, 可為一個或多個.
+        參數 level_: 金字塔層數, 每層縮小一半.
+    '''
+    if isinstance(k_size_, Sequence):
+        return tuple(scale_kernel(size, level_) for size in k_size_)
+    return max(1, 2 * int(k_size_ / 2 ** level_ / 2) + 1)
+
+@profiled
+def pyramid_detect(frame_: np.ndarray, threshold_: 'Callable[[np.ndarray], np.ndarray]',
+                   level_: int=1, area_threshold_: 'int | float'=0, number_found_: int=1,
+                   morph_: 'Sequence' = None, refine_: bool=True,
+                   padding_: int=4) -> PyramidResult:
+    '''
+        用途:
+        以金字塔模式找出面積最大的輪廓, 並同時返回粗略與精修結果.
+
+        參數 frame_: 原解析度影像.
+        參數 threshold_: 二值化函式, 輸入影像(可為任意大小的區域), 返回二值影像.
+        參數 level_: 金字塔層數, 每層以cv.pyrDown縮小一半.
+        參數 area_threshold_: 原解析度的最小容許面積, 自動依層數換算.
+        參數 number_found_: 返回的最大輪廓數量, 規則同largest_contour.
+        參數 morph_: morph()的參數(method_, kernel_size_[, kernel_shape_, iterations]),
+                     內核大小為原解析度數值, 自動依層數換算, 可不設定.
+        參數 refine_: 是否在原解析度精修選中的輪廓.
+        參數 padding_: 精修時外接矩形向外擴張的像素.
+
+        範例用法:
+        threshold = lambda img: cv.inRange(cv.cvtColor(img, cv.COLOR_BGR2HSV), lower, upper)\n
+        result = pyramid_detect(frame, threshold, 2, 1000, 1, (cv.MORPH_OPEN, 5))
+
+        運作方式:
+        1. 縮小影像level_次後二值化、做型態學處理並找輪廓.
+        2. 以換算後的面積門檻選出前number_found_大的輪廓.
+        3. 精修時將輪廓外接矩形放大回原解析度並擴張padding_, 在該區域
+           以原解析度二值化, 取最大輪廓為精修結果.
+    '''
+    scale = 2 ** level_
+    small = frame_
+    for _ in range(level_):
+        small = cv.pyrDown(small)
+
+    binary = threshold_(small)
+    if morph_:
+        method, k_size, *rest = morph_
+        binary = morph(binary, method, scale_kernel(k_size, level_), *rest)
+
+    contours, _ = cv.findContours(binary, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
+    coarse = tuple(contour * scale for contour in contours)
+    index = largest_contour(contours, area_threshold_ / scale ** 2, number_found_)
+    if index is None:
+        return PyramidResult(coarse, None, (), (), ())
+
+    coarse_area = tuple(cv.contourArea(coarse[i]) for i in index)
+    if not refine_:
+        return PyramidResult(coarse, index, (None,) * len(index), coarse_area, (0.0,) * len(index))
+
+    height, width = frame_.shape[:2]
+    refined = []
+    for i in index:
+        x, y, w, h = cv.boundingRect(coarse[i])
+        x1, y1 = max(x - scale - padding_, 0), max(y - scale - padding_, 0)
+        x2 = min(x + w + scale + padding_, width)
+        y2 = min(y + h + scale + padding_, height)
+        roi = threshold_(frame_[y1:y2, x1:x2])
+        if morph_:
+            roi = morph(roi, *morph_)
+        candidate, _ = cv.findContours(roi, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE,
+                                       offset=(x1, y1))
+        best = largest_contour(candidate, 0, 1)
+        refined.append(None if best is None else candidate[best[0]])
+
+    refined_area = tuple(0.0 if contour is None else cv.contourArea(contour)
+                         for contour in refined)
+    return PyramidResult(coarse, index, tuple(refined), coarse_area, refined_area)
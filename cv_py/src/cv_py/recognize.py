@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 import cv2 as cv
 import numpy as np
-import cv_py.image
-from typing import Sequence
+from typing import Any, Callable, Sequence
+from .image import SLICE, ContourSet, ContourTable, slice_half
+from .profiling import profiled
 
 """
     尚未定型
@@ -21,29 +22,32 @@ def average_point(*points_: Sequence['int | float']) -> np.ndarray:
     points = np.array(points_)
     return points.mean(axis=0)
 
+@profiled
 def simple_line_check(contour_: np.ndarray, threshold_: 'int | float',
-                      image_: np.ndarray=None) -> bool:
+                      image_: np.ndarray=None, rect_: 'Sequence[int]'=None) -> bool:
     '''
         用途:
         以角度檢測輪廓方向是否成直線.
 
-        參數 contour_: 輪廓, 只能為單個輪廓.
+        參數 contour_: 輪廓, 只能為單個輪廓, 可為ContourSet取出的視圖.
         參數 threshold_: 最小角度差.
         參數 image_: 影像, 可將旋轉矩形之結果繪製至該影像.
+        參數 rect_: 輪廓外接矩形(x, y, w, h), 可由ContourTable.bbox提供,
+                    未指定則自行計算.
     '''
-    rect = cv.boundingRect(contour_)
+    rect = cv.boundingRect(contour_) if rect_ is None else tuple(int(v) for v in rect_)
     mask = np.zeros((rect[3], rect[2]), np.uint8)
     cv.drawContours(mask, [contour_], -1, 255, -1, offset=(-rect[0], -rect[1]))
-    roi_1, roi_2 = cv_py.image.slice_half(mask, cv_py.image.SLICE.SLICE_SHORTEST)
+    roi_1, roi_2 = slice_half(mask, SLICE.SLICE_SHORTEST)
 
     contour_1, _ = cv.findContours(roi_1, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
     contour_2, _ = cv.findContours(roi_2, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
 
-    angle_1 = cv.minAreaRect(contour_1[0])[2]
-    angle_2 = cv.minAreaRect(contour_2[0])[2]
+    rotate_1 = cv.minAreaRect(contour_1[0])
+    rotate_2 = cv.minAreaRect(contour_2[0])
+    angle_1 = rotate_1[2]
+    angle_2 = rotate_2[2]
     if image_ is not None:
-        rotate_1 = cv.minAreaRect(contour_1[0])
-        rotate_2 = cv.minAreaRect(contour_2[0])
         box_1 = np.int0(cv.boxPoints(rotate_1))
         box_2 = np.int0(cv.boxPoints(rotate_2))
         if rect[2] >= rect[3]:
@@ -53,6 +57,135 @@ def simple_line_check(contour_: np.ndarray, threshold_: 'int | float',
         cv.drawContours(image_, [box_1], -1, (0, 255, 0), 3, offset=(rect[0], rect[1]))
         cv.drawContours(image_, [box_2], -1, (255, 255, 0), 3, offset=offset)
 
+    return _angle_check(angle_1, angle_2, threshold_)
+
+@profiled
+def simple_line_check_batch(contours_: 'Sequence[np.ndarray] | ContourTable | ContourSet',
+                            threshold_: 'int | float') -> np.ndarray:
+    '''
+        用途:
+        對多個輪廓執行simple_line_check, 返回布林陣列, 結果與逐一呼叫相同
+        (例外見注意事項).
+
+        參數 contours_: 輪廓序列、ContourTable或ContourSet, 若為後兩者則直接
+                        使用其外接矩形.
+        參數 threshold_: 最小角度差.
+
+        運作方式:
+        1. 不繪製遮罩, 直接以幾何方式對半: 所有輪廓的多邊形一次以numpy
+           裁切到兩半各自的像素範圍(見_half_angle), 再對每一半做
+           cv.minAreaRect.
+        2. _half_angle無法確保與繪製版相同的輪廓(見其說明)改用
+           simple_line_check逐一計算.
+        3. 幾何計算有約0.3ms的固定成本, 輪廓少於_BATCH_MIN個時直接逐一計算.
+
+        注意事項:
+        兩個候選旋轉矩形面積相同時, cv.minAreaRect選哪一個取決於點的
+        順序, 此時角度可能與逐一呼叫不同. 隨機形狀中約0.1%的輪廓如此,
+        逐一呼叫的結果在這種情況下本身也只是點順序的巧合.
+    '''
+    if isinstance(contours_, ContourTable):
+        rects = np.asarray(contours_.bbox)
+        contours = contours_.contours
+    elif isinstance(contours_, ContourSet):
+        rects = contours_.bbox
+        contours = contours_
+    else:
+        rects = np.array([cv.boundingRect(contour) for contour in contours_],
+                         np.int32).reshape(-1, 4)
+        contours = contours_
+
+    if len(contours) < _BATCH_MIN:
+        return np.array([simple_line_check(contours[i], threshold_, rect_=rects[i])
+                         for i in range(len(contours))], bool)
+
+    contour_set = contours if isinstance(contours, ContourSet) else ContourSet.from_contours(contours)
+    angle = _half_angle(contour_set.points, contour_set.offsets, rects)
+    result = _angle_check_array(angle[:, 0], angle[:, 1], threshold_)
+    for i in np.flatnonzero(np.isnan(angle).any(axis=1)).tolist():
+        result[i] = simple_line_check(contour_set[i], threshold_, rect_=rects[i])
+
+    return result
+
+# 輪廓數量低於此值時numpy的固定成本高於逐一計算
+_BATCH_MIN = 16
+
+def _half_angle(points_: np.ndarray, offsets_: np.ndarray, rects_: np.ndarray) -> np.ndarray:
+    '''
+        用途:
+        依simple_line_check的對半方式, 返回每個輪廓兩半的cv.minAreaRect角度,
+        shape (N, 2), 需逐一計算的輪廓為nan.
+
+        參數 points_: ContourSet.points.
+        參數 offsets_: ContourSet.offsets.
+        參數 rects_: 各輪廓外接矩形(x, y, w, h).
+
+        運作方式:
+        1. 同slice_half(SLICE_SHORTEST): 寬大於等於高時在x = x0 + w // 2
+           左右對半, 否則在y = y0 + h // 2上下對半. 第一半為座標小於該值
+           的像素, 第二半為大於等於該值的像素.
+        2. 輪廓點為邊界像素中心, 以多邊形每條邊對兩半的像素邊界(cut - 1
+           與cut)做半平面裁切: 保留在內側的點, 並加入穿過邊界的交點.
+           findContours(CHAIN_APPROX_SIMPLE或NONE)的輪廓每條邊都是水平、
+           垂直或45度, 交點必為整數像素, 裁切後的凸包與繪製後再找輪廓的
+           凸包相同. 座標平移到該半的左上角後以int32傳入cv.minAreaRect,
+           與繪製版的浮點運算相同, 面積相近的候選矩形也會選到同一個.
+        3. 以下情況標為nan: 交點不是整數(其他近似方式的輪廓), 穿過邊界
+           超過2次(該半可能有多個區塊, 繪製版只取其中一個), 或該半為空.
+    '''
+    number = len(offsets_) - 1
+    length = np.diff(offsets_)
+    owner = np.repeat(np.arange(number), length)
+    following = np.arange(1, len(points_) + 1)
+    nonempty = length > 0
+    following[offsets_[1:][nonempty] - 1] = offsets_[:-1][nonempty]
+
+    width, height = rects_[:, 2], rects_[:, 3]
+    vertical = height <= width
+    axis = np.where(vertical, 0, 1)[owner]
+    cut = np.where(vertical, rects_[:, 0] + width // 2, rects_[:, 1] + height // 2)[owner]
+    # 兩半左上角的座標, 與繪製版相同以此為原點, 面積相近的候選矩形才會選到同一個
+    origin_1 = rects_[:, :2].astype(np.int32)
+    origin_2 = origin_1.copy()
+    origin_2[:, 0] += np.where(vertical, width // 2, 0)
+    origin_2[:, 1] += np.where(vertical, 0, height // 2)
+    origin = origin_1, origin_2
+    point = points_.astype(np.float64)
+    coord = point[np.arange(len(point)), axis]
+    coord_next = coord[following]
+
+    angle = np.full((number, 2), np.nan)
+    for side, (inside, line) in enumerate(((coord <= cut - 1, cut - 1), (coord >= cut, cut))):
+        cross = inside != inside[following]
+        start, end = point[cross], point[following[cross]]
+        ratio = (line[cross] - coord[cross]) / (coord_next[cross] - coord[cross])
+        intersection = start + (end - start) * ratio[:, None]
+        rounded = np.rint(intersection)
+        exact = np.ones(number, bool)
+        exact[owner[cross][(rounded != intersection).any(axis=1)]] = False
+
+        clipped_owner = np.concatenate((owner[inside], owner[cross]))
+        clipped = np.concatenate((points_[inside], rounded.astype(np.int32))) \
+            - origin[side][clipped_owner]
+        order = np.argsort(clipped_owner, kind="stable")
+        clipped = clipped[order]
+        bound = np.searchsorted(clipped_owner[order], np.arange(number + 1)).tolist()
+        valid = (exact & (np.bincount(owner[cross], minlength=number) <= 2)).tolist()
+        for i in range(number):
+            if valid[i] and bound[i] < bound[i + 1]:
+                angle[i, side] = cv.minAreaRect(clipped[bound[i]:bound[i + 1]])[2]
+
+    return angle
+
+def _angle_check(angle_1: float, angle_2: float, threshold_: 'int | float') -> bool:
+    '''
+        用途:
+        比較兩半輪廓旋轉矩形的角度, 判斷是否成直線.
+
+        參數 angle_1: 第一半的旋轉角度.
+        參數 angle_2: 第二半的旋轉角度.
+        參數 threshold_: 最小角度差.
+    '''
     if angle_1 <= threshold_ and angle_2 >= 90-threshold_:
         if 90-angle_2+angle_1 > threshold_:
             return False
@@ -68,4 +201,177 @@ def simple_line_check(contour_: np.ndarray, threshold_: 'int | float',
     if abs(angle_1-angle_2) > threshold_:
         return False
 
-    return True
\ No newline at end of file
+    return True
+
+def _angle_check_array(angle_1: np.ndarray, angle_2: np.ndarray,
+                       threshold_: 'int | float') -> np.ndarray:
+    '''
+        用途:
+        _angle_check的陣列版本, 逐元素結果相同.
+    '''
+    first = (angle_1 <= threshold_) & (angle_2 >= 90-threshold_)
+    second = ~first & (angle_2 <= threshold_) & (angle_1 >= 90-threshold_)
+    return np.where(first, 90-angle_2+angle_1 <= threshold_,
+                    np.where(second, 90-angle_1+angle_2 <= threshold_,
+                             np.abs(angle_1-angle_2) <= threshold_))
+
+class ContourTracker:
+    """
+        功能:
+        1. 以質心距離和外接矩形IoU在相鄰幀之間配對輪廓, 並給予固定的ID.
+        2. 每個ID的辨識結果(如simple_line_check)會被快取, 只有在面積或
+           外接矩形寬高變化超過drift_時才重新辨識, 畫面穩定時可省去
+           大部分的重複辨識.
+
+        範例用法:
+        tracker = ContourTracker()\n
+        table = ContourTable(contours)\n
+        ids = tracker.update(table)\n
+        for i in index:\n
+            if tracker.line_check(i, 20):\n
+                ...
+
+        運作方式:
+        1. 一次以NumPy計算所有(軌跡, 輪廓)的距離與IoU矩陣.
+        2. 距離不超過max_distance_或IoU不低於min_iou_的配對才有效,
+           以成本由小到大貪婪配對.
+        3. 未配對的輪廓建立新軌跡, 連續max_missed_幀未配對的軌跡刪除.
+    """
+    def __init__(self, max_distance_: float=50, min_iou_: float=0.3,
+                 drift_: float=0.2, max_missed_: int=5):
+        '''
+            用途:
+            建立追蹤器.
+
+            參數 max_distance_: 配對的最大質心距離(像素).
+            參數 min_iou_: 質心距離過大時, 外接矩形IoU達此值仍可配對.
+            參數 drift_: 面積或寬高的相對變化超過此值時, 快取的辨識結果失效.
+            參數 max_missed_: 軌跡可連續未配對的幀數.
+        '''
+        self.__max_distance: 'float' = max_distance_
+        self.__min_iou: 'float' = min_iou_
+        self.__drift: 'float' = drift_
+        self.__max_missed: 'int' = max_missed_
+        self.__next_id: 'int' = 0
+        self.__id: 'np.ndarray' = np.empty(0, np.int64)
+        self.__centroid: 'np.ndarray' = np.empty((0, 2), np.float64)
+        self.__bbox: 'np.ndarray' = np.empty((0, 4), np.float64)
+        self.__missed: 'np.ndarray' = np.empty(0, np.int64)
+        self.__cache: 'dict[int, dict]' = {}
+        self.__table: 'ContourTable' = None
+        self.__frame_id: 'np.ndarray' = np.empty(0, np.int64)
+
+    @staticmethod
+    def __iou(box_1: np.ndarray, box_2: np.ndarray) -> np.ndarray:
+        '''
+            用途:
+            計算兩組外接矩形(x, y, w, h)兩兩之間的IoU矩陣.
+        '''
+        x1 = np.maximum(box_1[:, None, 0], box_2[None, :, 0])
+        y1 = np.maximum(box_1[:, None, 1], box_2[None, :, 1])
+        x2 = np.minimum((box_1[:, 0] + box_1[:, 2])[:, None], (box_2[:, 0] + box_2[:, 2])[None, :])
+        y2 = np.minimum((box_1[:, 1] + box_1[:, 3])[:, None], (box_2[:, 1] + box_2[:, 3])[None, :])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        union = (box_1[:, 2] * box_1[:, 3])[:, None] + (box_2[:, 2] * box_2[:, 3])[None, :] - inter
+        return inter / np.maximum(union, 1)
+
+    @profiled
+    def update(self, contours_: 'Sequence[np.ndarray] | ContourTable') -> np.ndarray:
+        '''
+            用途:
+            以本幀輪廓更新軌跡, 返回與輪廓順序對應的ID陣列.
+
+            參數 contours_: 本幀輪廓或ContourTable.
+        '''
+        if not isinstance(contours_, ContourTable):
+            contours_ = ContourTable(contours_)
+        centroid = contours_.centroid
+        bbox = contours_.bbox.astype(np.float64)
+        number = len(contours_)
+
+        match_track = np.empty(0, np.int64)
+        match_contour = np.empty(0, np.int64)
+        if self.__id.size and number:
+            distance = np.linalg.norm(self.__centroid[:, None] - centroid[None, :], axis=2)
+            iou = self.__iou(self.__bbox, bbox)
+            valid = (distance <= self.__max_distance) | (iou >= self.__min_iou)
+            cost = np.where(valid, distance * (1 - iou), np.inf)
+            order = np.argsort(cost, axis=None)
+            order = order[:np.count_nonzero(valid)]
+            track, contour = np.unravel_index(order, cost.shape)
+            used_track = np.zeros(self.__id.size, bool)
+            used_contour = np.zeros(number, bool)
+            keep = []
+            for k, (t, c) in enumerate(zip(track.tolist(), contour.tolist())):
+                if not used_track[t] and not used_contour[c]:
+                    used_track[t] = used_contour[c] = True
+                    keep.append(k)
+            match_track, match_contour = track[keep], contour[keep]
+
+        frame_id = np.empty(number, np.int64)
+        frame_id[match_contour] = self.__id[match_track]
+        new = np.setdiff1d(np.arange(number), match_contour)
+        frame_id[new] = np.arange(self.__next_id, self.__next_id + new.size)
+        self.__next_id += new.size
+
+        missed = self.__missed + 1
+        missed[match_track] = 0
+        alive = np.flatnonzero(missed <= self.__max_missed)
+        alive = alive[~np.isin(alive, match_track)]
+        for track_id in np.setdiff1d(self.__id, np.concatenate((self.__id[alive], frame_id))):
+            self.__cache.pop(int(track_id), None)
+
+        self.__id = np.concatenate((frame_id, self.__id[alive]))
+        self.__centroid = np.concatenate((centroid, self.__centroid[alive]))
+        self.__bbox = np.concatenate((bbox, self.__bbox[alive]))
+        self.__missed = np.concatenate((np.zeros(number, np.int64), missed[alive]))
+        self.__table = contours_
+        self.__frame_id = frame_id
+        return frame_id
+
+    def __descriptor(self, index_: int) -> np.ndarray:
+        return np.array((self.__table.area[index_],
+                         self.__table.bbox[index_, 2], self.__table.bbox[index_, 3]), np.float64)
+
+    def classify(self, index_: int, fn_: 'Callable[[np.ndarray], Any]', key_: Any=None) -> Any:
+        '''
+            用途:
+            返回本幀第index_個輪廓的辨識結果, 軌跡形狀未明顯改變時使用快取.
+
+            參數 index_: 輪廓在最近一次update()中的索引值.
+            參數 fn_: 辨識函式, 輸入單個輪廓.
+            參數 key_: 快取鍵值, 同一軌跡可快取多種辨識結果, 預設為fn_.
+        '''
+        key = fn_ if key_ is None else key_
+        cache = self.__cache.setdefault(int(self.__frame_id[index_]), {})
+        descriptor = self.__descriptor(index_)
+        if key in cache:
+            reference, result = cache[key]
+            change = np.abs(descriptor - reference) / np.maximum(reference, 1)
+            if change.max() <= self.__drift:
+                return result
+
+        result = fn_(self.__table.contours[index_])
+        cache[key] = descriptor, result
+        return result
+
+    def line_check(self, index_: int, threshold_: 'int | float') -> bool:
+        '''
+            用途:
+            以快取執行simple_line_check.
+
+            參數 index_: 輪廓在最近一次update()中的索引值.
+            參數 threshold_: 最小角度差.
+        '''
+        rect = self.__table.bbox[index_]
+        return self.classify(index_, lambda contour: simple_line_check(contour, threshold_,
+                                                                       rect_=rect),
+                             ("simple_line_check", threshold_))
+
+    @property
+    def ids(self) -> np.ndarray:
+        '''
+            用途:
+            最近一次update()中各輪廓的ID.
+        '''
+        return self.__frame_id
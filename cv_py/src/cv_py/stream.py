@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+import cv2 as cv
+import numpy as np
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Iterable, Iterator
+
+"""
+    尚未定型
+
+    功能:
+    將擷取、處理與顯示拆成不同執行緒, 擷取延遲不再疊加到處理延遲上.
+    openCV函式執行時會釋放GIL, 因此處理執行緒可與擷取同時運作.
+"""
+
+class FrameQueue:
+    """
+        功能:
+        固定容量的執行緒安全佇列, 滿了之後放入新資料會丟棄最舊的資料,
+        確保取得的永遠是最新的影像.
+    """
+    def __init__(self, capacity_: int=2):
+        '''
+            用途:
+            建立佇列.
+
+            參數 capacity_: 最大容量, 至少為1.
+        '''
+        if capacity_ < 1:
+            raise ValueError("Capacity must be greater than 0")
+        self.__item: 'deque' = deque(maxlen=capacity_)
+        self.__condition = threading.Condition()
+        self.__closed: 'bool' = False
+        self.dropped: 'int' = 0
+
+    def __len__(self) -> int:
+        return len(self.__item)
+
+    def put(self, item_: Any):
+        '''
+            用途:
+            放入資料, 佇列已滿時丟棄最舊的資料.
+        '''
+        with self.__condition:
+            if len(self.__item) == self.__item.maxlen:
+                self.dropped += 1
+            self.__item.append(item_)
+            self.__condition.notify()
+
+    def get(self, timeout_: float=None) -> Any:
+        '''
+            用途:
+            取出最舊的資料, 佇列為空時等待.
+
+            參數 timeout_: 最長等待秒數, 未指定則無限等待.
+
+            注意事項:
+            逾時或佇列已關閉且為空時回傳None.
+        '''
+        with self.__condition:
+            if not self.__condition.wait_for(lambda: self.__item or self.__closed, timeout_):
+                return None
+            if not self.__item:
+                return None
+            return self.__item.popleft()
+
+    def close(self):
+        '''
+            用途:
+            關閉佇列, 喚醒所有等待中的get().
+        '''
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self.__closed
+
+class RateMeter:
+    """
+        功能:
+        以最近幾次事件的時間戳計算每秒次數.
+    """
+    def __init__(self, window_: int=30):
+        self.__stamp: 'deque[float]' = deque(maxlen=window_)
+        self.count: 'int' = 0
+
+    def tick(self):
+        self.__stamp.append(time.perf_counter())
+        self.count += 1
+
+    @property
+    def fps(self) -> float:
+        if len(self.__stamp) < 2:
+            return 0.0
+        return (len(self.__stamp) - 1) / (self.__stamp[-1] - self.__stamp[0])
+
+class Stream:
+    """
+        功能:
+        1. 擷取執行緒讀取影像並放入容量固定的佇列, 滿了丟棄最舊的影像.
+        2. 處理執行緒取出影像並呼叫處理函式.
+        3. 主執行緒以results()取得(影像, 處理結果)並負責顯示.
+        4. stats()提供各階段FPS和佇列深度.
+
+        影像來源:
+        cv.VideoCapture物件、裝置路徑/編號/影片檔名(交給cv.VideoCapture開啟),
+        或任何會產生影像的可迭代物件(方便無螢幕環境測試).
+
+        範例用法:
+        stream = Stream("/dev/video0", lambda frame: cv_py.morph(frame, cv.MORPH_OPEN, 5))\n
+        with stream:\n
+            for frame, result in stream.results():\n
+                cv.imshow("result", result)
+
+        注意事項:
+        處理函式在非主執行緒執行, 勿在其中呼叫cv.imshow或cv.waitKey.
+    """
+    def __init__(self, source_: 'cv.VideoCapture | str | int | Iterable[np.ndarray]',
+                 process_: 'Callable[[np.ndarray], Any]', capacity_: int=2):
+        '''
+            用途:
+            建立串流, 呼叫start()或使用with後開始運作.
+
+            參數 source_: 影像來源.
+            參數 process_: 處理函式, 輸入影像, 返回處理結果.
+            參數 capacity_: 擷取與結果佇列的容量.
+        '''
+        if isinstance(source_, (str, int)):
+            source_ = cv.VideoCapture(source_)
+            if not source_.isOpened():
+                raise IOError("Open video source failed")
+
+        self.__source = source_
+        self.__process = process_
+        self.__frame = FrameQueue(capacity_)
+        self.__result = FrameQueue(capacity_)
+        self.__stop = threading.Event()
+        self.__thread: 'list[threading.Thread]' = []
+        self.__meter: 'dict[str, RateMeter]' = {name: RateMeter()
+                                                for name in ("capture", "process", "display")}
+        self.error: 'BaseException' = None
+
+    def __enter__(self) -> 'Stream':
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
+
+    def __frames(self) -> 'Iterator[np.ndarray]':
+        '''
+            用途:
+            將不同的影像來源統一成迭代器.
+        '''
+        if hasattr(self.__source, "read"):
+            while True:
+                ret, frame = self.__source.read()
+                if not ret:
+                    return
+                yield frame
+        else:
+            yield from self.__source
+
+    def __capture(self):
+        try:
+            for frame in self.__frames():
+                if self.__stop.is_set():
+                    break
+                self.__frame.put(frame)
+                self.__meter["capture"].tick()
+        except BaseException as error:
+            self.error = error
+        finally:
+            self.__frame.close()
+            # 由擷取執行緒自己釋放, 確保不會在read()途中被其他執行緒釋放
+            self.__release()
+
+    def __release(self):
+        if isinstance(self.__source, cv.VideoCapture):
+            self.__source.release()
+
+    def __work(self):
+        try:
+            while not self.__stop.is_set():
+                frame = self.__frame.get(0.1)
+                if frame is None:
+                    if self.__frame.closed and not len(self.__frame):
+                        break
+                    continue
+                self.__result.put((frame, self.__process(frame)))
+                self.__meter["process"].tick()
+        except BaseException as error:
+            self.error = error
+        finally:
+            self.__result.close()
+
+    def start(self):
+        '''
+            用途:
+            啟動擷取與處理執行緒.
+        '''
+        if self.__thread:
+            raise RuntimeError("Stream already started")
+        self.__thread = [threading.Thread(target=self.__capture, daemon=True),
+                         threading.Thread(target=self.__work, daemon=True)]
+        for thread in self.__thread:
+            thread.start()
+
+    def stop(self, timeout_: float=1.0):
+        '''
+            用途:
+            停止執行緒並釋放cv.VideoCapture.
+
+            參數 timeout_: 等待每個執行緒結束的秒數.
+
+            注意事項:
+            cv.VideoCapture由擷取執行緒結束時釋放, 逾時返回時read()可能仍在
+            執行, 會在該次讀取結束後才釋放. 未啟動時直接在此釋放.
+        '''
+        self.__stop.set()
+        self.__frame.close()
+        self.__result.close()
+        if not self.__thread:
+            self.__release()
+        for thread in self.__thread:
+            thread.join(timeout_)
+
+    def results(self, timeout_: float=None) -> 'Iterator[tuple[np.ndarray, Any]]':
+        '''
+            用途:
+            在主執行緒依序取得(影像, 處理結果), 來源結束或呼叫stop()後停止.
+
+            參數 timeout_: 單次最長等待秒數, 逾時則結束迭代.
+        '''
+        while True:
+            item = self.__result.get(timeout_)
+            if item is None:
+                if self.error is not None:
+                    raise self.error
+                return
+            self.__meter["display"].tick()
+            yield item
+
+    def stats(self) -> 'dict[str, float]':
+        '''
+            用途:
+            返回各階段FPS、佇列深度與丟棄的影像數量.
+        '''
+        return {"capture_fps": self.__meter["capture"].fps,
+                "process_fps": self.__meter["process"].fps,
+                "display_fps": self.__meter["display"].fps,
+                "frame_queue": len(self.__frame),
+                "result_queue": len(self.__result),
+                "frame_dropped": self.__frame.dropped,
+                "result_dropped": self.__result.dropped}
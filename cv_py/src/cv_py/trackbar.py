@@ -1,7 +1,134 @@
 #!/usr/bin/env python3
 import cv2 as cv
+import json
+import os
 from enum import IntEnum
-from typing import Sequence
+from types import MappingProxyType
+from typing import Callable, Mapping, Sequence
+from .profiling import profiled
+
+def _read_file(path_: 'str') -> dict:
+    '''
+        用途:
+        依副檔名讀取JSON或YAML檔, YAML需安裝PyYAML.
+    '''
+    with open(path_) as file:
+        if path_.endswith((".yaml", ".yml")):
+            return _yaml().safe_load(file) or {}
+        return json.load(file)
+
+def _write_file(path_: 'str', data_: dict):
+    '''
+        用途:
+        依副檔名寫入JSON或YAML檔, YAML需安裝PyYAML.
+    '''
+    with open(path_, "w") as file:
+        if path_.endswith((".yaml", ".yml")):
+            _yaml().safe_dump(data_, file)
+        else:
+            json.dump(data_, file, indent=4)
+
+def _yaml():
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError("PyYAML is required to read or write YAML files") from None
+    return yaml
+
+class HighGUIBackend:
+    """
+        功能:
+        openCV HighGUI拉條後端, Trackbar的預設後端, 需要視窗環境.
+    """
+    @staticmethod
+    def namedWindow(window_name_: 'str'):
+        cv.namedWindow(window_name_)
+
+    @staticmethod
+    def createTrackbar(bar_name_: 'str', window_name_: 'str', value_: 'int',
+                       count_: 'int', on_change_: 'Callable[[int], None]'):
+        cv.createTrackbar(bar_name_, window_name_, value_, count_, on_change_)
+
+    @staticmethod
+    def getTrackbarPos(bar_name_: 'str', window_name_: 'str') -> int:
+        return cv.getTrackbarPos(bar_name_, window_name_)
+
+    @staticmethod
+    def setTrackbarPos(bar_name_: 'str', window_name_: 'str', pos_: 'int'):
+        cv.setTrackbarPos(bar_name_, window_name_, pos_)
+
+    @staticmethod
+    def setTrackbarMin(bar_name_: 'str', window_name_: 'str', min_: 'int'):
+        cv.setTrackbarMin(bar_name_, window_name_, min_)
+
+    @staticmethod
+    def setTrackbarMax(bar_name_: 'str', window_name_: 'str', max_: 'int'):
+        cv.setTrackbarMax(bar_name_, window_name_, max_)
+
+class MemoryBackend:
+    """
+        功能:
+        1. 不需視窗的拉條後端, 介面與HighGUIBackend相同, 可用於無螢幕
+           主機和自動化測試.
+        2. 位置限制在[最小值, 最大值]內, 位置改變時同步呼叫回調函數,
+           與HighGUI行為一致, 因此限制、群組、刻度和重置功能皆相同.
+        3. 可從JSON/YAML檔載入拉條數值, 檔案格式為
+           {視窗名稱: {拉條名稱: 數值}}, 可由Trackbar.save()產生.
+
+        範例用法:
+        backend = MemoryBackend.load("hsv.json")\n
+        HSV = Trackbar("TRACKBAR", hsv_name, hsv_init, hsv_count, backend)
+    """
+    def __init__(self, values_: 'Mapping[str, Mapping[str, int]]' = None):
+        '''
+            用途:
+            建立後端.
+
+            參數 values_: 預先載入的拉條數值, 格式為{視窗名稱: {拉條名稱: 數值}},
+                          建立拉條時取代初始值.
+        '''
+        self.__preset: 'dict[str, dict[str, int]]' = {window: dict(bars)
+                                                      for window, bars in (values_ or {}).items()}
+        # (視窗, 拉條) -> [位置, 最小值, 最大值, 回調函數]
+        self.__bar: 'dict[tuple[str, str], list]' = {}
+
+    @classmethod
+    def load(cls, path_: 'str') -> 'MemoryBackend':
+        '''
+            用途:
+            從JSON或YAML檔建立後端.
+
+            參數 path_: 檔案路徑, 副檔名為.yaml或.yml時以YAML讀取.
+        '''
+        return cls(_read_file(path_))
+
+    def namedWindow(self, window_name_: 'str'):
+        pass
+
+    def createTrackbar(self, bar_name_: 'str', window_name_: 'str', value_: 'int',
+                       count_: 'int', on_change_: 'Callable[[int], None]'):
+        value = self.__preset.get(window_name_, {}).get(bar_name_, value_)
+        self.__bar[window_name_, bar_name_] = [min(max(value, 0), count_), 0, count_, on_change_]
+
+    def getTrackbarPos(self, bar_name_: 'str', window_name_: 'str') -> int:
+        return self.__bar[window_name_, bar_name_][0]
+
+    def setTrackbarPos(self, bar_name_: 'str', window_name_: 'str', pos_: 'int'):
+        bar = self.__bar[window_name_, bar_name_]
+        pos = min(max(pos_, bar[1]), bar[2])
+        if pos != bar[0]:
+            bar[0] = pos
+            bar[3](pos)
+
+    def setTrackbarMin(self, bar_name_: 'str', window_name_: 'str', min_: 'int'):
+        bar = self.__bar[window_name_, bar_name_]
+        bar[1] = min_
+        self.setTrackbarPos(bar_name_, window_name_, bar[0])
+
+    def setTrackbarMax(self, bar_name_: 'str', window_name_: 'str', max_: 'int'):
+        bar = self.__bar[window_name_, bar_name_]
+        bar[2] = max_
+        self.setTrackbarPos(bar_name_, window_name_, bar[0])
 
 class Trackbar:
     """
@@ -11,6 +138,7 @@ class Trackbar:
         3. 可將多個拉條群組化, 相關數值一次取得.
         4. 可進行簡單的拖曳範圍限制.
         5. 可一次重置所有拉條位置.
+        6. 可替換後端, 預設為HighGUIBackend, 無視窗環境可用MemoryBackend.
 
         獲取數值方式:
         已知情況: HSV = Trackbar(......)\n
@@ -21,6 +149,14 @@ class Trackbar:
            自定義刻度數值.
         2. 限制設定無法一條函式設定多個拉條.
         3. 群組設定無法一條函式設定多個群組.
+
+        數值更新方式:
+        每個拉條有各自的回調函數, 拉動時只更新該拉條與包含它的群組, 並
+        標記限制和刻度需重新檢查, values()僅在有標記時才執行檢查.
+
+        版本號:
+        每個拉條與群組各有一個只增不減的版本號, 數值改變時加1, 可用
+        version()判斷參數是否改變, 不需比較數值, 見StageGraph.
     """
     class LimitMode(IntEnum):
         '''
@@ -36,7 +172,8 @@ class Trackbar:
         LIMIT_LESS = 1
 
     def __init__(self, window_name_: 'str', bar_name_: 'str | Sequence',
-                 bar_init_: 'int | Sequence', bar_count_: 'int | Sequence'):
+                 bar_init_: 'int | Sequence', bar_count_: 'int | Sequence',
+                 backend_: 'HighGUIBackend | MemoryBackend' = None):
         '''
             用途:
             拉條資料初始化.
@@ -45,9 +182,10 @@ class Trackbar:
             參數 bar_name_: 拉條名稱, 數量可為一個或多個.
             參數 bar_init_: 拉條初始值, 數量可為一個或多個.
             參數 bar_count_: 拉條刻度最大值, 數量可為一個或多個.
+            參數 backend_: 拉條後端, 未指定則使用HighGUIBackend.
 
             注意事項:
-            除了參數window_name_, 其他參數之數量需保持一致.
+            除了參數window_name_和backend_, 其他參數之數量需保持一致.
         '''
         if not isinstance(window_name_, str):
             raise TypeError(f"Window name type is str, not {type(window_name_)}")
@@ -92,8 +230,14 @@ class Trackbar:
         self.__bar_tick: 'dict[str, tuple[int]]' = {}
         self.__bar_last: 'dict[str, int]' = {}
         self.__window_name: 'str' = window_name_
+        self.__backend: 'HighGUIBackend | MemoryBackend' = backend_ or HighGUIBackend()
         self.__group: 'dict[str, tuple[str]]' = {}
         self.__group_value: 'dict[str, tuple[int]]' = {}
+        self.__member_of: 'dict[str, list[str]]' = {name: [] for name in self.__bar_name}
+        self.__version: 'dict[str, int]' = {name: 0 for name in self.__bar_name}
+        self.__watch: 'set[str]' = set()
+        self.__dirty: 'set[str]' = set()
+        self.__snapshot: 'Mapping[str, int | tuple]' = None
         self.__done_build: 'bool' = False
         self.__build()
 
@@ -102,23 +246,27 @@ class Trackbar:
             用途:
             視窗和拉條建立.
         '''
-        cv.namedWindow(self.__window_name)
+        self.__backend.namedWindow(self.__window_name)
         for name in self.__bar_name:
-            cv.createTrackbar(name, self.__window_name, self.__bar_value[name],
-                              self.__bar_count[name], self.__track)
+            self.__backend.createTrackbar(name, self.__window_name, self.__bar_value[name],
+                                          self.__bar_count[name],
+                                          lambda pos, name=name: self.__track(name, pos))
+            self.__bar_value[name] = self.__backend.getTrackbarPos(name, self.__window_name)
         self.__done_build = True
 
-    def __limit(self):
+    def __limit(self, dirty_: 'set[str]'):
         '''
             用途:
             執行拉條的限制.
 
+            參數 dirty_: 數值有變動的拉條名稱.
+
             運作方式:
-            1. 查看有哪些被限制的拉條, 並檢查是否有跟其他拉條比較.
+            1. 查看有哪些被限制的拉條與被比較的拉條數值有變動.
             2. 若拉條數值越過限制, 就重設拉條位置至限制數值之前一格.
 
             原始碼編輯注意:
-            勿將實現方式(尤其是cv.setTrackbarPos)放於__track內,
+            勿將實現方式(尤其是setTrackbarPos)放於__track內,
             即可能導致__track無限遞迴直到超過Python遞迴限制, 並結束程式.
         '''
         if not self.__bar_limit:
@@ -126,28 +274,32 @@ class Trackbar:
 
         for name in self.__bar_limit:
             mode, value, compare = self.__bar_limit[name]
+            if name not in dirty_ and compare not in dirty_:
+                continue
             if mode == self.LimitMode.LIMIT_GREATER \
             and self.__bar_value[name]-value <= self.__bar_value[compare]:
                 if self.__bar_value[name] == self.__bar_count[name]:
-                    cv.setTrackbarPos(compare, self.__window_name,
-                                        self.__bar_value[name] - 1)
+                    self.__backend.setTrackbarPos(compare, self.__window_name,
+                                                  self.__bar_value[name] - 1)
                 else:
-                    cv.setTrackbarPos(name, self.__window_name,
-                                        self.__bar_value[compare] + value)
+                    self.__backend.setTrackbarPos(name, self.__window_name,
+                                                  self.__bar_value[compare] + value)
 
             elif mode == self.LimitMode.LIMIT_LESS \
             and self.__bar_value[name]+value >= self.__bar_value[compare]:
                 if self.__bar_value[name] == 0:
-                    cv.setTrackbarPos(compare, self.__window_name, 1)
+                    self.__backend.setTrackbarPos(compare, self.__window_name, 1)
                 else:
-                    cv.setTrackbarPos(name, self.__window_name,
-                                        self.__bar_value[compare] - value)
+                    self.__backend.setTrackbarPos(name, self.__window_name,
+                                                  self.__bar_value[compare] - value)
     
-    def __skip(self):
+    def __skip(self, dirty_: 'set[str]'):
         if not self.__bar_tick:
             return
         
-        for name, last in self.__bar_last.items():
+        for name, last in list(self.__bar_last.items()):
+            if name not in dirty_:
+                continue
             if self.__bar_value[name] > last:
                 index = self.__bar_tick[name].index(last)
                 if index < len(self.__bar_tick[name]) - 1:
@@ -161,16 +313,19 @@ class Trackbar:
                     self.change_value(name, value)
                     self.__bar_last[name] = value
 
-    def __track(self, pos_: 'int'):
+    def __track(self, name_: 'str', pos_: 'int'):
         '''
             用途:
-            openCV拉條的回調函數, 獲取拉條數值.
+            openCV拉條的回調函數, 每個拉條各自綁定, 只更新變動的拉條.
 
-            參數 pos_: 拉條更新值, 無應用.
+            參數 name_: 變動的拉條名稱.
+            參數 pos_: 拉條更新值.
 
             運作方式:
-            1. 獲取各拉條之數值, 並存進self.bar_value中.
-            2. 若有創建群組, 則獲取成員數值, 並存進self.__group_value中.
+            1. 將數值存進self.__bar_value中.
+            2. 只重新組合包含此拉條的群組數值.
+            3. 數值有改變時, 此拉條與所屬群組的版本號加1.
+            4. 若此拉條與限制或刻度相關, 則標記待values()檢查.
 
             原始碼編輯注意:
             1. 若去除self.__done_build, 根據不同的運行速度, 在拉條創建
@@ -178,14 +333,34 @@ class Trackbar:
             2. 勿將會觸發__track()的函式放進__track()內.
         '''
         if self.__done_build:
-            for name in self.__bar_name:
-                self.__bar_value[name] = cv.getTrackbarPos(name, self.__window_name)
-            if self.__group:
-                for group_name in self.__group:
-                    member_value = []
-                    for member in self.__group[group_name]:
-                        member_value.append(self.__bar_value[member])
-                    self.__group_value[group_name] = tuple(member_value)
+            if self.__bar_value[name_] != pos_:
+                self.__version[name_] += 1
+                for group_name in self.__member_of[name_]:
+                    self.__version[group_name] += 1
+            self.__bar_value[name_] = pos_
+            for group_name in self.__member_of[name_]:
+                self.__update_group(group_name)
+            if name_ in self.__watch:
+                self.__dirty.add(name_)
+            self.__snapshot = None
+
+    def __update_group(self, group_name_: 'str'):
+        '''
+            用途:
+            依成員數值重新組合群組數值.
+        '''
+        self.__group_value[group_name_] = tuple(self.__bar_value[member]
+                                                for member in self.__group[group_name_])
+
+    def __check(self):
+        '''
+            用途:
+            若有標記的拉條, 執行刻度與限制檢查.
+        '''
+        if self.__dirty:
+            dirty, self.__dirty = self.__dirty, set()
+            self.__skip(dirty)
+            self.__limit(dirty)
 
     def change_value(self, name_: 'str | Sequence', value_: 'int | Sequence'):
         '''
@@ -217,13 +392,13 @@ class Trackbar:
             if name_ in self.__group:
                 if isinstance(value_, int):
                     for name in self.__group[name_]:
-                        cv.setTrackbarPos(name, self.__window_name, value_)
+                        self.__backend.setTrackbarPos(name, self.__window_name, value_)
 
                 elif isinstance(value_, Sequence):
                     if len(self.__group[name_]) != len(value_):
                         raise ValueError("Inconsistent amount of input data")
                     for name, value in zip(self.__group[name_], value_):
-                        cv.setTrackbarPos(name, self.__window_name, value)
+                        self.__backend.setTrackbarPos(name, self.__window_name, value)
 
                 else:
                     raise TypeError("Value type must be int or Sequence")
@@ -231,7 +406,7 @@ class Trackbar:
             elif name_ in self.__bar_name:
                 if not isinstance(value_, int):
                     raise TypeError("Value type should be int")
-                cv.setTrackbarPos(name_, self.__window_name, value_)
+                self.__backend.setTrackbarPos(name_, self.__window_name, value_)
 
             else:
                 raise ValueError(f"Name {name_} doesn't exist")
@@ -363,7 +538,7 @@ class Trackbar:
             set_group("min", ("Hmin", "Smin", "Vmin"))
 
             運作方式:
-            將輸入參數放進字典, 並呼叫__track()一次以更新群組數值,
+            將輸入參數放進字典, 記錄各成員所屬群組並更新群組數值,
             後續運作請參考原始碼裡的__track().
 
             原始碼編輯注意:
@@ -389,7 +564,11 @@ class Trackbar:
             raise ValueError("Group name conflicts with trackbar name")
 
         self.__group[group_name_] = tuple(member_name_)
-        self.__track(0)
+        self.__version[group_name_] = 0
+        for name in member_name_:
+            self.__member_of[name].append(group_name_)
+        self.__update_group(group_name_)
+        self.__snapshot = None
 
     def set_limit(self, bar_name_: 'str', mode_: 'int', value_: 'int',
                   bar_compare_: 'str' = ""):
@@ -428,10 +607,12 @@ class Trackbar:
         
         if bar_compare_:
             self.__bar_limit[bar_name_] = (mode_, value_, bar_compare_)
+            self.__watch.update((bar_name_, bar_compare_))
+            self.__dirty.add(bar_name_)
         elif mode_ == self.LimitMode.LIMIT_GREATER:
-            cv.setTrackbarMin(bar_name_, self.__window_name, value_ + 1)
+            self.__backend.setTrackbarMin(bar_name_, self.__window_name, value_ + 1)
         elif mode_ == self.LimitMode.LIMIT_LESS:
-            cv.setTrackbarMax(bar_name_, self.__window_name, value_ - 1)
+            self.__backend.setTrackbarMax(bar_name_, self.__window_name, value_ - 1)
 
     def _set_odd_tick(self, start: int, end: int):
         '''
@@ -528,6 +709,7 @@ class Trackbar:
 
         tick = sorted(list(set(tick)))
         self.__bar_tick[name] = tick
+        self.__watch.add(name)
         if self.__bar_value[name] not in tick:
             self.__bar_last[name] = tick[0]
             self.change_value(name, tick[0])
@@ -538,6 +720,21 @@ class Trackbar:
         self.set_limit(name, self.LimitMode.LIMIT_GREATER, tick[0] - 1)
         self.set_limit(name, self.LimitMode.LIMIT_LESS, tick[-1] + 1)
         
+    def save(self, path_: 'str'):
+        '''
+            用途:
+            將拉條數值寫入JSON或YAML檔, 之後可用MemoryBackend.load()載入.
+
+            參數 path_: 檔案路徑, 副檔名為.yaml或.yml時以YAML寫入.
+
+            注意事項:
+            檔案已存在時只更新此視窗的拉條, 多個Trackbar可存進同一個檔案.
+        '''
+        data = _read_file(path_) if os.path.exists(path_) else {}
+        data.setdefault(self.__window_name, {}).update(self.__bar_value)
+        _write_file(path_, data)
+
+    @profiled
     def values(self, name_: 'str') -> 'int | tuple':
         '''
             用途:
@@ -552,11 +749,48 @@ class Trackbar:
         '''
         if not isinstance(name_, str):
             raise TypeError("Name type must be str")
-        self.__skip()
-        self.__limit()
+        self.__check()
 
-        if name_ in self.__bar_name:
+        if name_ in self.__bar_value:
             return self.__bar_value[name_]
-        if name_ in self.__group:
+        if name_ in self.__group_value:
             return self.__group_value[name_]
         raise ValueError(f"Name {name_} doesn't exist")
+
+    def version(self, name_: 'str') -> int:
+        '''
+            用途:
+            返回拉條或群組的版本號, 數值每改變一次加1, 不會減少.
+
+            參數 name_: 已創建的拉條名稱或群組名稱.
+
+            注意事項:
+            與values()相同, 會先套用待檢查的限制與刻度, 因此返回的版本號
+            與當下values()的數值一致.
+        '''
+        if not isinstance(name_, str):
+            raise TypeError("Name type must be str")
+        self.__check()
+
+        if name_ in self.__version:
+            return self.__version[name_]
+        raise ValueError(f"Name {name_} doesn't exist")
+
+    @profiled
+    def snapshot(self) -> 'Mapping[str, int | tuple]':
+        '''
+            用途:
+            一次返回所有拉條與群組數值的唯讀字典, 適合每幀開頭呼叫一次.
+
+            注意事項:
+            數值未變動時返回同一個物件, 拉條變動後才建立新的快照,
+            舊的快照內容不會被修改.
+
+            範例用法:
+            params = HSV.snapshot()\n
+            cv.inRange(hsv, params["min"], params["max"])
+        '''
+        self.__check()
+        if self.__snapshot is None:
+            self.__snapshot = MappingProxyType({**self.__bar_value, **self.__group_value})
+        return self.__snapshot